@@ -0,0 +1,9 @@
+"""性能测试工具
+
+此包提供在没有聊天平台的情况下评估插件性能的脚本，包括：
+- loadtest: 使用替身事件并发驱动插件处理器的压测工具
+- bench_anan: 安安说局部渲染与整图渲染的像素一致性校验与基准测试
+- bench_trial: 审判表情包 NumPy 合成与 sketchbook 绘制的像素一致性校验与基准测试
+- bench_cost: 估算开销与实际渲染耗时的关系，用于确定开销估算方式与默认上限
+- bench_router: 渲染路由的分布均匀度、重新映射比例与故障转移测试
+"""
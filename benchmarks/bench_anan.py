@@ -0,0 +1,95 @@
+"""安安说渲染基准测试
+
+此模块对比局部渲染（draw_anan）与整图渲染（draw_anan_full_frame），包括：
+- 逐表情、逐样例文本校验两者输出像素一致
+- 统计两者的平均与中位渲染耗时
+
+用法（在 AstrBot 的插件目录所在的工作目录中运行）:
+    python -m data.plugins.astrbot_plugin_manosaba_memes.benchmarks.bench_anan --iterations 50
+"""
+
+import argparse
+import io
+import statistics
+import sys
+import time
+from typing import Callable, List, Optional
+
+from PIL import Image, ImageChops
+
+from ..constants import FACE_WHITELIST
+from ..drawer import draw_anan, draw_anan_full_frame, prebake_anan_canvases
+
+
+SAMPLE_TEXTS = [
+    "吾辈现在不想说话",
+    "吾辈命令你现在【猛击自己的魔丸一百下】",
+    "第一行\n第二行\n第三行",
+    "这是一段比较长的文本，用来测试自动缩放字号与自动换行的效果是否正常，" * 3,
+    "g",
+    "【" * 20,
+]
+
+
+def is_pixel_identical(left: bytes, right: bytes) -> bool:
+    """Check whether two encoded images have identical pixels"""
+    with Image.open(io.BytesIO(left)) as a, Image.open(io.BytesIO(right)) as b:
+        if a.size != b.size:
+            return False
+        return ImageChops.difference(a.convert("RGBA"), b.convert("RGBA")).getbbox() is None
+
+
+def time_render(
+    render: Callable[[str, Optional[str]], bytes],
+    faces: List[Optional[str]],
+    iterations: int,
+) -> List[float]:
+    """Time renders of all sample texts and faces
+
+    Returns:
+        List[float]: The duration of each render in seconds
+    """
+    durations = []
+    for _ in range(iterations):
+        for face in faces:
+            for text in SAMPLE_TEXTS:
+                start = time.perf_counter()
+                render(text, face)
+                durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="安安说局部渲染与整图渲染基准测试")
+    parser.add_argument("--iterations", type=int, default=20, help="每个样例的重复次数")
+    args = parser.parse_args()
+
+    faces: List[Optional[str]] = [None, *sorted(FACE_WHITELIST)]
+
+    prebake_anan_canvases()
+    mismatches = [
+        (face, text)
+        for face in faces
+        for text in SAMPLE_TEXTS
+        if not is_pixel_identical(draw_anan(text, face), draw_anan_full_frame(text, face))
+    ]
+    for face, text in mismatches:
+        print(f"像素不一致: 表情={face} 文本={text[:20]!r}")
+    print(f"像素一致性: {len(faces) * len(SAMPLE_TEXTS) - len(mismatches)}"
+          f"/{len(faces) * len(SAMPLE_TEXTS)}")
+
+    full = time_render(draw_anan_full_frame, faces, args.iterations)
+    region = time_render(draw_anan, faces, args.iterations)
+    for name, durations in (("整图渲染", full), ("局部渲染", region)):
+        print(
+            f"{name}: 平均 {statistics.mean(durations) * 1000:.2f}ms "
+            f"中位 {statistics.median(durations) * 1000:.2f}ms"
+        )
+    print(f"节省: {(1 - statistics.mean(region) / statistics.mean(full)) * 100:.1f}%")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""渲染开销估算基准测试
+
+此模块测量估算开销与实际渲染耗时之间的关系，用于确定 render_cost 的估算方式与默认上限，包括：
+- 纯文本、【】高亮文本与多行文本在不同长度下的安安说渲染耗时
+- 按纯文本拟合每个字符的渲染耗时，并估算【】括号与换行相对普通字符的额外开销
+- 每页 3 个选项、每个选项达到长度上限时的审判表情包渲染耗时
+- 按时间预算的一定比例推算建议的开销上限
+
+用法（在 AstrBot 的插件目录所在的工作目录中运行）:
+    python -m data.plugins.astrbot_plugin_manosaba_memes.benchmarks.bench_cost --lengths 2000,10000,50000
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+
+from ..models import Character, Option, Statement, MAX_OPTION_TEXT_LENGTH
+from ..constants import DEFAULT_RENDER_BUDGET_SECONDS
+from ..drawer import draw_anan, draw_trial, get_options_per_page, prebake_anan_canvases
+from ..render_cost import estimate_text_cost
+
+
+# 各类文本的生成方式：按目标长度生成文本
+TEXT_KINDS: Dict[str, Callable[[int], str]] = {
+    "纯文本": lambda length: "测" * length,
+    "【】高亮": lambda length: "【测】" * (length // 3),
+    "多行": lambda length: "测\n" * (length // 2),
+}
+
+
+def time_call(func: Callable[..., bytes], *args, repeat: int) -> float:
+    """Get the median duration of a call in seconds, after one warm-up call"""
+    func(*args)
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def measure_anan(lengths: List[int], repeat: int) -> Dict[str, List[Tuple[str, float]]]:
+    """Measure anan renders of every text kind and length
+
+    Returns:
+        Dict[str, List[Tuple[str, float]]]: The (text, seconds) samples of each text kind
+    """
+    return {
+        kind: [
+            (make(length), time_call(draw_anan, make(length), None, repeat=repeat))
+            for length in lengths
+        ]
+        for kind, make in TEXT_KINDS.items()
+    }
+
+
+def extra_weight(
+    samples: List[Tuple[str, float]],
+    count: Callable[[str], int],
+    intercept: float,
+    slope: float,
+) -> float:
+    """Estimate how many plain characters one bracket or newline costs in addition to itself
+
+    用纯文本的拟合结果预测同样长度的纯文本耗时，将实测耗时多出的部分平摊到每个括号或换行上。
+    """
+    weights = [
+        (seconds - intercept - slope * len(text)) / (count(text) * slope)
+        for text, seconds in samples
+    ]
+    return statistics.median(weights)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="渲染开销估算与实际渲染耗时基准测试")
+    parser.add_argument(
+        "--lengths", type=lambda value: [int(v) for v in value.split(",")],
+        default=[2000, 10000, 50000], help="安安说文本长度，以逗号分隔",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="每个样例的重复次数")
+    parser.add_argument(
+        "--budget", type=float, default=DEFAULT_RENDER_BUDGET_SECONDS,
+        help="单次渲染时间预算（秒）",
+    )
+    parser.add_argument(
+        "--budget-fraction", type=float, default=0.2,
+        help="建议上限对应的预算比例，为字体与机器差异留出余量",
+    )
+    args = parser.parse_args()
+
+    if len(args.lengths) < 2:
+        parser.error("--lengths 至少需要两个长度")
+
+    prebake_anan_canvases()
+    anan = measure_anan(args.lengths, args.repeat)
+    print(f"{'类型':<8}{'长度':>8}{'估算开销':>10}{'耗时(ms)':>10}{'µs/开销':>10}")
+    for kind, samples in anan.items():
+        for text, seconds in samples:
+            cost = estimate_text_cost(text)
+            print(
+                f"{kind:<8}{len(text):>8}{cost:>10}{seconds * 1000:>10.1f}"
+                f"{seconds / cost * 1e6:>10.2f}"
+            )
+
+    slope, intercept = statistics.linear_regression(
+        [len(text) for text, _ in anan["纯文本"]],
+        [seconds for _, seconds in anan["纯文本"]],
+    )
+    bracket_weight = extra_weight(
+        anan["【】高亮"], lambda text: text.count("【") + text.count("】"), intercept, slope
+    )
+    newline_weight = extra_weight(
+        anan["多行"], lambda text: text.count("\n"), intercept, slope
+    )
+    print(f"\n每个字符: {slope * 1e6:.2f}µs，固定开销: {intercept * 1000:.1f}ms")
+    print(f"括号额外权重: {bracket_weight:.2f}，换行额外权重: {newline_weight:.2f}（≤ 0 表示不比普通字符更贵）")
+
+    # 审判表情包的耗时主要来自图片合成，文本长度受选项长度上限约束
+    options = [
+        Option(Statement.AGREEMENT, make(MAX_OPTION_TEXT_LENGTH))
+        for make in TEXT_KINDS.values()
+    ][:get_options_per_page()]
+    trial_cost = sum(estimate_text_cost(option.text) for option in options)
+    trial_seconds = time_call(draw_trial, Character.EMA, options, repeat=args.repeat)
+    short_seconds = time_call(
+        draw_trial, Character.EMA, [Option(Statement.AGREEMENT, "测")] * len(options),
+        repeat=args.repeat,
+    )
+    print(
+        f"审判表情包整页（估算开销 {trial_cost}）: {trial_seconds * 1000:.1f}ms，"
+        f"同样选项数的短文本: {short_seconds * 1000:.1f}ms"
+    )
+
+    limit = (args.budget * args.budget_fraction - intercept) / slope
+    print(
+        f"建议开销上限: {limit:.0f}"
+        f"（预计耗时 {args.budget * args.budget_fraction:g}s，为预算的 {args.budget_fraction:.0%}）"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""渲染路由基准测试
+
+此模块评估一致性哈希渲染路由，包括：
+- 渲染键在各后端之间的分布均匀程度
+- 增加或移除一个后端时被重新映射的渲染键比例
+- 使用进程内的本地后端替身验证故障转移与健康检查恢复
+- 使用真实的渲染进程池验证一个会让工作进程崩溃的输入不会拖垮所有后端
+
+用法（在 AstrBot 的插件目录所在的工作目录中运行）:
+    python -m data.plugins.astrbot_plugin_manosaba_memes.benchmarks.bench_router --backends 4
+"""
+
+import argparse
+import asyncio
+import os
+from collections import Counter
+from typing import Dict, List
+
+from ..render_pool import RenderPool
+from ..render_router import (
+    HashRing,
+    LocalRenderBackend,
+    RenderBackendError,
+    RenderRouter,
+)
+from ..utils import get_anan_render_key
+
+
+def make_keys(count: int) -> List[str]:
+    """Build distinct render keys"""
+    return [get_anan_render_key(f"样例文本 {i}") for i in range(count)]
+
+
+def assign(ring: HashRing, keys: List[str]) -> Dict[str, str]:
+    """Map each key to its backend"""
+    return {key: ring.get_node(key) for key in keys}
+
+
+def remapped_fraction(before: Dict[str, str], after: Dict[str, str]) -> float:
+    """Get the fraction of keys whose backend changed"""
+    return sum(before[key] != after[key] for key in before) / len(before)
+
+
+def _echo(*args) -> bytes:
+    return repr(args).encode("utf-8")
+
+
+def _crash(*args) -> bytes:
+    """Kill the worker process, standing in for an input that crashes the renderer"""
+    os._exit(1)
+
+
+class _FlakyBackend(LocalRenderBackend):
+    """An in-process backend that can be switched off to simulate a failure"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.down = False
+
+    async def render(self, func, *args) -> bytes:
+        if self.down:
+            raise RenderBackendError(f"渲染后端 {self.name} 模拟故障")
+        return await super().render(func, *args)
+
+    async def health_check(self) -> bool:
+        return not self.down
+
+
+async def check_failover(backend_count: int, keys: List[str]) -> bool:
+    """Check that keys of a failed backend move to others and come back after recovery"""
+    backends = [_FlakyBackend(f"backend-{i}") for i in range(backend_count)]
+    router = RenderRouter(backends, health_check_interval=0)
+    owner = {key: router.ring.get_node(key) for key in keys}
+
+    backends[0].down = True
+    for key in keys:
+        await router.submit(key, _echo, key)
+    if "backend-0" not in router._unhealthy:
+        return False
+
+    backends[0].down = False
+    await router.check_health()
+    await router.shutdown()
+    return "backend-0" not in router._unhealthy and all(
+        router.ring.get_node(key) == owner[key] for key in keys
+    )
+
+
+async def check_crashing_input(backend_count: int) -> bool:
+    """Check that a crashing input fails alone and later valid requests still succeed
+
+    健康检查关闭时也应如此：崩溃的输入最多影响归属后端与一个故障转移后端，
+    之后的正常请求仍能得到渲染结果。
+    """
+    router = RenderRouter(
+        [
+            LocalRenderBackend(f"backend-{i}", RenderPool(1, 10))
+            for i in range(backend_count)
+        ],
+        health_check_interval=0,
+    )
+    try:
+        try:
+            await router.submit("crash", _crash)
+            return False
+        except RenderBackendError:
+            pass
+        if len(router._unhealthy) > min(backend_count, 2):
+            return False
+        for key in make_keys(20):
+            await router.submit(key, _echo, key)
+        return True
+    except RenderBackendError:
+        return False
+    finally:
+        await router.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="渲染路由一致性哈希基准测试")
+    parser.add_argument("--backends", type=int, default=4, help="后端数量")
+    parser.add_argument("--replicas", type=int, default=100, help="每个后端的虚拟节点数")
+    parser.add_argument("--keys", type=int, default=20000, help="渲染键数量")
+    args = parser.parse_args()
+
+    if args.backends < 2:
+        parser.error("--backends 至少为 2")
+
+    keys = make_keys(args.keys)
+    ring = HashRing(args.replicas)
+    for i in range(args.backends):
+        ring.add(f"backend-{i}")
+    before = assign(ring, keys)
+
+    counts = Counter(before.values())
+    ideal = len(keys) / args.backends
+    print(
+        f"分布: 最少 {min(counts.values()) / ideal:.2f}x 最多 {max(counts.values()) / ideal:.2f}x"
+        f"（理想值 1.00x）"
+    )
+
+    ring.add(f"backend-{args.backends}")
+    after_add = assign(ring, keys)
+    print(
+        f"增加一个后端: 重新映射 {remapped_fraction(before, after_add) * 100:.1f}%"
+        f"（理想值 {100 / (args.backends + 1):.1f}%）"
+    )
+
+    ring.remove(f"backend-{args.backends}")
+    ring.remove("backend-0")
+    after_remove = assign(ring, keys)
+    print(
+        f"移除一个后端: 重新映射 {remapped_fraction(before, after_remove) * 100:.1f}%"
+        f"（理想值 {100 / args.backends:.1f}%）"
+    )
+
+    ok = asyncio.run(check_failover(args.backends, keys[:200]))
+    print(f"故障转移与恢复: {'通过' if ok else '失败'}")
+
+    for backend_count in (1, args.backends):
+        ok = asyncio.run(check_crashing_input(backend_count))
+        print(f"崩溃输入隔离（{backend_count} 个后端）: {'通过' if ok else '失败'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""审判表情合成基准测试
+
+此模块对比 NumPy 合成（draw_trial_numpy）与 sketchbook 逐步绘制（draw_trial），包括：
+- 覆盖所有角色、所有陈述类型与所有允许的选项数量（含超出画布的选项），校验两者输出像素一致
+- 按一页内的选项数量统计两者的平均与中位渲染耗时
+
+用法（在 AstrBot 的插件目录所在的工作目录中运行）:
+    python -m data.plugins.astrbot_plugin_manosaba_memes.benchmarks.bench_trial --iterations 20
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from typing import Callable, List, Tuple
+
+from ..models import Character, Option, Statement
+from ..constants import MAX_OPTIONS_COUNT
+from ..drawer import draw_trial, get_options_per_page
+from ..trial_compositor import draw_trial_numpy, is_available, prebake_trial_assets
+from .bench_anan import SAMPLE_TEXTS, is_pixel_identical
+
+
+def make_cases(seed: int) -> List[Tuple[Character, List[Option]]]:
+    """Build cases covering every character, statement, and allowed option count"""
+    rng = random.Random(seed)
+    statements = list(Statement)
+    cases = []
+    for character in Character:
+        for count in range(1, MAX_OPTIONS_COUNT + 1):
+            # 依次轮换陈述类型，保证每种图标都出现在每个选项位置上
+            for start in range(0, len(statements), count):
+                cases.append((character, [
+                    Option(statements[(start + i) % len(statements)], rng.choice(SAMPLE_TEXTS))
+                    for i in range(count)
+                ]))
+    return cases
+
+
+def time_render(
+    render: Callable[[Character, List[Option]], bytes],
+    cases: List[Tuple[Character, List[Option]]],
+    iterations: int,
+) -> List[float]:
+    """Time renders of all cases
+
+    Returns:
+        List[float]: The duration of each render in seconds
+    """
+    durations = []
+    for _ in range(iterations):
+        for character, options in cases:
+            start = time.perf_counter()
+            render(character, options)
+            durations.append(time.perf_counter() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="审判表情 NumPy 合成与 sketchbook 绘制基准测试")
+    parser.add_argument("--iterations", type=int, default=5, help="每个样例的重复次数")
+    parser.add_argument("--seed", type=int, default=0, help="样例文本的随机种子")
+    args = parser.parse_args()
+
+    if not is_available():
+        print("未安装 numpy，无法运行 NumPy 合成后端")
+        sys.exit(1)
+
+    prebake_trial_assets()
+    cases = make_cases(args.seed)
+    mismatches = [
+        (character, options)
+        for character, options in cases
+        if not is_pixel_identical(
+            draw_trial_numpy(character, options), draw_trial(character, options)
+        )
+    ]
+    for character, options in mismatches:
+        print(
+            f"像素不一致: 角色={character.value} "
+            f"陈述={[option.statement.name for option in options]}"
+        )
+    print(f"像素一致性: {len(cases) - len(mismatches)}/{len(cases)}")
+
+    for count in range(1, get_options_per_page() + 1):
+        subset = [case for case in cases if len(case[1]) == count]
+        sketchbook = time_render(draw_trial, subset, args.iterations)
+        numpy_ = time_render(draw_trial_numpy, subset, args.iterations)
+        print(f"{count} 个选项:")
+        for name, durations in (("sketchbook", sketchbook), ("numpy", numpy_)):
+            print(
+                f"  {name}: 平均 {statistics.mean(durations) * 1000:.2f}ms "
+                f"中位 {statistics.median(durations) * 1000:.2f}ms"
+            )
+        print(f"  节省: {(1 - statistics.mean(numpy_) / statistics.mean(sketchbook)) * 100:.1f}%")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""插件处理器压测工具
+
+此模块在没有聊天平台的情况下并发驱动插件处理器，包括：
+- FakeContext / FakeEvent: AstrBot Context 与 AstrMessageEvent 的替身
+- 按可配置的消息配比与到达速率模拟 N 个并发会话
+- 统计端到端 p50/p95/p99 延迟、吞吐量、事件循环延迟与内存占用，超时、被拒绝与出错的请求分列统计
+
+需要在已安装 AstrBot 的环境中以模块方式运行（插件使用相对导入），例如：
+    python -m data.plugins.astrbot_plugin_manosaba_memes.benchmarks.loadtest \\
+        --sessions 50 --rate 0.5 --duration 30 --mix anan=5,trial=4,trial_paged=1,switch=1
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+from ..main import ManosabaMemesPlugin
+from ..constants import FACE_WHITELIST, DEFAULT_TRIAL_BACKEND, TRIAL_BACKENDS
+
+
+# 默认消息配比（权重）
+DEFAULT_MIX = {"anan": 5, "trial": 4, "switch": 1}
+
+# 事件循环延迟采样间隔（秒）
+LOOP_LAG_INTERVAL = 0.01
+
+ANAN_SAMPLES = [
+    "吾辈现在不想说话",
+    "吾辈命令你现在【猛击自己的魔丸一百下】",
+    "今天也是\\n元气满满的一天",
+    "这是一段比较长的文本，用来测试自动缩放字号与自动换行的效果是否正常",
+]
+
+TRIAL_SAMPLES = [
+    "【伪证】我和艾玛不是恋人",
+    "【疑问】你昨晚在哪里",
+    "【反驳】那把刀根本不在现场",
+    "【赞同】【魔女】就在我们之中",
+    "【魔法:诺亚】液体操控",
+    "【魔法：希罗】死亡回归",
+]
+
+CHARACTER_SAMPLES = ["艾玛", "希罗"]
+
+# 应当生成图片的消息类型，这些请求只得到文本回复时不算成功
+IMAGE_KINDS = {"anan", "trial", "trial_paged"}
+
+# 处理器回复文本的前缀：渲染超时（RenderTimeoutError 的提示）与未预期的错误
+TIMEOUT_REPLY_PREFIX = "图片渲染超时"
+ERROR_REPLY_PREFIX = "生成图片失败"
+
+# 请求结果分类，按报告中的列顺序排列
+OUTCOMES = ("ok", "timeout", "rejected", "error")
+
+# 消息类型到处理器方法名的映射
+HANDLERS = {
+    "anan": "handle_anan_says",
+    "trial": "handle_trial",
+    "trial_paged": "handle_trial",
+    "switch": "handle_switch_character",
+}
+
+
+class FakeContext:
+    """Stand-in for the AstrBot Context passed to Star.__init__"""
+
+    pass
+
+
+@dataclass
+class FakeResult:
+    """A result yielded by a plugin handler
+
+    Attributes:
+        kind (str): The result kind, "plain", "image" or "chain"
+        content (str): The plain text or the image path(s)
+        size (int): The total size in bytes of the images, 0 for plain results
+    """
+
+    kind: str
+    content: str
+    size: int = 0
+
+
+class FakeEvent:
+    """Stand-in for AstrMessageEvent implementing the parts the handlers use"""
+
+    def __init__(self, message_str: str, session_id: str):
+        self.message_str = message_str
+        self.session_id = session_id
+
+    def get_session_id(self) -> str:
+        return self.session_id
+
+    def plain_result(self, text: str) -> FakeResult:
+        return FakeResult("plain", text)
+
+    def image_result(self, path: str) -> FakeResult:
+        # 处理器会在结果被消费后删除临时文件，因此在这里读取大小
+        return FakeResult("image", path, os.path.getsize(path))
+
+    def chain_result(self, chain: list) -> FakeResult:
+        paths = [c.path for c in chain if getattr(c, "path", None)]
+        return FakeResult("chain", ",".join(paths), sum(os.path.getsize(p) for p in paths))
+
+
+@dataclass
+class LoadTestStats:
+    """Collected measurements of a load test run
+
+    Attributes:
+        latencies (Dict[str, List[float]]): End-to-end latencies in seconds of successful
+                                            requests per message kind
+        outcomes (Dict[str, Dict[str, int]]): Number of requests per message kind and outcome
+        loop_lags (List[float]): Event loop lag samples in seconds
+        image_bytes (int): Total size of all produced images
+    """
+
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    outcomes: Dict[str, Dict[str, int]] = field(
+        default_factory=lambda: defaultdict(lambda: defaultdict(int))
+    )
+    loop_lags: List[float] = field(default_factory=list)
+    image_bytes: int = 0
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse a message mix such as "anan=5,trial=4,switch=1"
+
+    Args:
+        text (str): The mix specification
+
+    Returns:
+        Dict[str, float]: The weight of each message kind
+
+    Raises:
+        ValueError: If a kind is unknown or a weight is invalid
+    """
+    mix = {}
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in HANDLERS:
+            raise ValueError(f"未知的消息类型: {kind}，可选: {', '.join(HANDLERS)}")
+        mix[kind] = float(weight) if weight else 1.0
+        if mix[kind] < 0:
+            raise ValueError(f"消息权重不能为负数: {item}")
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("消息配比不能为空")
+    return mix
+
+
+def make_message(kind: str, rng: random.Random) -> str:
+    """Build a random message for a message kind
+
+    Args:
+        kind (str): The message kind
+        rng (random.Random): The random generator to use
+
+    Returns:
+        str: The message string as a user would send it
+    """
+    if kind == "anan":
+        text = rng.choice(ANAN_SAMPLES)
+        if rng.random() < 0.5:
+            text += " " + rng.choice(sorted(FACE_WHITELIST))
+        return f"安安说 {text}"
+    if kind == "trial":
+        return "\n".join(rng.sample(TRIAL_SAMPLES, rng.randint(1, 3)))
+    if kind == "trial_paged":
+        return "\n".join(rng.choices(TRIAL_SAMPLES, k=rng.randint(4, 12)))
+    return f"切换角色 {rng.choice(CHARACTER_SAMPLES)}"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Compute a nearest-rank percentile
+
+    Args:
+        values (List[float]): The samples
+        pct (float): The percentile in the range 0..100
+
+    Returns:
+        float: The percentile value, 0.0 if there are no samples
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def classify_outcome(kind: str, results: List[FakeResult]) -> str:
+    """Classify a completed request by what its handler replied
+
+    Args:
+        kind (str): The message kind
+        results (List[FakeResult]): The results yielded by the handler
+
+    Returns:
+        str: "ok" if the request got what it asked for, "timeout" if the render ran
+             over its budget, "error" for unexpected failures, and "rejected" for any
+             other request that should have produced an image but got only text,
+             such as input validation or render cost rejections
+    """
+    if kind not in IMAGE_KINDS or any(r.kind in ("image", "chain") for r in results):
+        return "ok"
+    texts = [r.content for r in results if r.kind == "plain"]
+    if any(text.startswith(ERROR_REPLY_PREFIX) for text in texts):
+        return "error"
+    if any(text.startswith(TIMEOUT_REPLY_PREFIX) for text in texts):
+        return "timeout"
+    return "rejected"
+
+
+async def drive_request(
+    plugin: ManosabaMemesPlugin, kind: str, event: FakeEvent, stats: LoadTestStats
+):
+    """Run one message through its handler and record its outcome and latency
+
+    只有成功的请求计入延迟统计，超时与被拒绝的请求不会拉低延迟分位数。
+    """
+    handler = getattr(plugin, HANDLERS[kind])
+    start = time.perf_counter()
+    results = []
+    try:
+        async for result in handler(event):
+            results.append(result)
+            stats.image_bytes += result.size
+        outcome = classify_outcome(kind, results)
+    except Exception:
+        outcome = "error"
+    stats.outcomes[kind][outcome] += 1
+    if outcome == "ok":
+        stats.latencies[kind].append(time.perf_counter() - start)
+
+
+async def run_session(
+    plugin: ManosabaMemesPlugin,
+    session_id: str,
+    mix: Dict[str, float],
+    rate: float,
+    deadline: float,
+    stats: LoadTestStats,
+    rng: random.Random,
+):
+    """Simulate one chat session sending messages with Poisson arrivals
+
+    请求按到达时间发出而不等待前一个请求完成（开环），以模拟真实的突发流量。
+    """
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    tasks = []
+    while True:
+        await asyncio.sleep(rng.expovariate(rate))
+        if time.perf_counter() >= deadline:
+            break
+        kind = rng.choices(kinds, weights)[0]
+        event = FakeEvent(make_message(kind, rng), session_id)
+        tasks.append(asyncio.create_task(drive_request(plugin, kind, event, stats)))
+    await asyncio.gather(*tasks)
+
+
+async def monitor_loop_lag(stats: LoadTestStats, stop: asyncio.Event):
+    """Sample how late the event loop wakes up a sleeping task"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        stats.loop_lags.append(max(0.0, time.perf_counter() - start - LOOP_LAG_INTERVAL))
+
+
+def get_peak_rss_mb(who: int) -> Optional[float]:
+    """Get a peak resident set size in MiB, if available
+
+    Args:
+        who (int): resource.RUSAGE_SELF for this process, or resource.RUSAGE_CHILDREN
+                   for the largest child process that has exited and been reaped
+
+    Returns:
+        Optional[float]: The peak RSS in MiB, or None if it cannot be measured
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux 以 KiB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+async def run_load_test(
+    sessions: int,
+    rate: float,
+    duration: float,
+    mix: Dict[str, float],
+    seed: Optional[int] = None,
+    trial_backend: str = DEFAULT_TRIAL_BACKEND,
+) -> LoadTestStats:
+    """Drive the plugin handlers with concurrent simulated sessions
+
+    Args:
+        sessions (int): The number of concurrent sessions
+        rate (float): The message arrival rate per session (messages per second)
+        duration (float): How long new messages keep arriving (seconds)
+        mix (Dict[str, float]): The weight of each message kind
+        seed (Optional[int]): The random seed for reproducible runs
+        trial_backend (str): The compositing backend of trial memes
+
+    Returns:
+        LoadTestStats: The collected measurements
+    """
+    plugin = ManosabaMemesPlugin(
+        FakeContext(), {"render": {"trial_backend": trial_backend}}
+    )
+    stats = LoadTestStats()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # 不调用 initialize()，避免依赖 AstrBot 运行时提供的数据目录
+        plugin.data_file = Path(data_dir) / "character_preferences.json"
+
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(monitor_loop_lag(stats, stop))
+        rng = random.Random(seed)
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            run_session(
+                plugin, f"loadtest:{i}", mix, rate, deadline, stats,
+                random.Random(rng.random()),
+            )
+            for i in range(sessions)
+        ))
+        stop.set()
+        await monitor
+        await plugin.terminate()
+
+    return stats
+
+
+def format_row(kind: str, counts: Dict[str, int], latencies: List[float]) -> str:
+    """Format one row of the report table"""
+    return (
+        f"{kind:<12}{sum(counts[o] for o in OUTCOMES):>8}"
+        + "".join(f"{counts[o]:>6}" for o in OUTCOMES)
+        + f"{percentile(latencies, 50) * 1000:>10.1f}"
+        f"{percentile(latencies, 95) * 1000:>10.1f}"
+        f"{percentile(latencies, 99) * 1000:>10.1f}"
+    )
+
+
+def format_report(stats: LoadTestStats, elapsed: float) -> str:
+    """Format the measurements as a human-readable report
+
+    Args:
+        stats (LoadTestStats): The collected measurements
+        elapsed (float): The wall time of the run in seconds
+
+    Returns:
+        str: The report
+    """
+    header = "".join(f"{label:>6}" for label in ("成功", "超时", "拒绝", "错误"))
+    lines = [
+        f"{'类型':<12}{'请求数':>8}{header}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}"
+    ]
+    all_latencies = []
+    totals = defaultdict(int)
+    for kind in sorted(stats.outcomes):
+        counts = stats.outcomes[kind]
+        values = stats.latencies[kind]
+        all_latencies.extend(values)
+        for outcome in OUTCOMES:
+            totals[outcome] += counts[outcome]
+        lines.append(format_row(kind, counts, values))
+    lines.append(format_row("total", totals, all_latencies))
+    lines.append("延迟分位数只统计成功的请求")
+    lines.append("")
+    requests = sum(totals.values())
+    lines.append(
+        f"耗时: {elapsed:.2f}s  吞吐量: {requests / elapsed:.2f} req/s"
+        f"（成功 {totals['ok'] / elapsed:.2f} req/s）"
+    )
+    lines.append(
+        f"事件循环延迟: p50={percentile(stats.loop_lags, 50) * 1000:.1f}ms "
+        f"p99={percentile(stats.loop_lags, 99) * 1000:.1f}ms "
+        f"max={max(stats.loop_lags, default=0.0) * 1000:.1f}ms"
+    )
+    lines.append(f"生成图片总大小: {stats.image_bytes / 1024:.1f} KiB")
+    if resource is not None:
+        # 渲染在工作进程中进行，压测结束时插件已关闭全部工作进程，
+        # 因此 RUSAGE_CHILDREN 可以取到其中峰值 RSS 最大的一个
+        lines.append(
+            f"峰值 RSS: 主进程 {get_peak_rss_mb(resource.RUSAGE_SELF):.1f} MiB，"
+            f"单个渲染进程最大 {get_peak_rss_mb(resource.RUSAGE_CHILDREN):.1f} MiB"
+        )
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f"主进程 Python 堆: 当前 {current / 1024 / 1024:.1f} MiB, 峰值 {peak / 1024 / 1024:.1f} MiB")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="魔裁 Memes 插件处理器压测工具")
+    parser.add_argument("--sessions", type=int, default=20, help="并发会话数")
+    parser.add_argument("--rate", type=float, default=0.5, help="每个会话每秒发送的消息数")
+    parser.add_argument("--duration", type=float, default=10.0, help="发送消息的持续时间（秒）")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=DEFAULT_MIX,
+        help="消息配比，例如 anan=5,trial=4,switch=1",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument(
+        "--trial-backend", choices=TRIAL_BACKENDS, default=DEFAULT_TRIAL_BACKEND,
+        help="审判表情包合成后端",
+    )
+    parser.add_argument(
+        "--tracemalloc", action="store_true",
+        help="使用 tracemalloc 统计主进程的 Python 堆内存（会拖慢运行）",
+    )
+    args = parser.parse_args()
+
+    if args.sessions <= 0 or args.rate <= 0 or args.duration <= 0:
+        parser.error("--sessions、--rate 和 --duration 必须大于 0")
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    start = time.perf_counter()
+    stats = asyncio.run(
+        run_load_test(
+            args.sessions, args.rate, args.duration, args.mix, args.seed,
+            args.trial_backend,
+        )
+    )
+    print(format_report(stats, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
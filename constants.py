@@ -24,9 +24,15 @@ OPTION_END_Y = 780
 # 最大间距（像素）
 MAX_PADDING = 286
 
+# 选项之间的最小间距（像素）
+OPTION_MIN_SPACING = 20
+
 # 最大选项数量限制（防止过多选项导致渲染问题）
 MAX_OPTIONS_COUNT = 10
 
+# 分页模式下的最大选项数量限制
+MAX_PAGED_OPTIONS_COUNT = 30
+
 # 声明图标尺寸
 STATEMENT_ICON_WIDTH = 146
 STATEMENT_ICON_HEIGHT = 128
@@ -48,4 +54,36 @@ BRACKET_COLOR = (39, 33, 30, 255)
 ANAN_REGION_X = 100
 ANAN_REGION_Y = 432
 ANAN_REGION_WIDTH = 319
-ANAN_REGION_HEIGHT = 204
\ No newline at end of file
+ANAN_REGION_HEIGHT = 204
+
+# 安安说文本区域的外扩边距（像素）
+# 文本适配绘制时字形可能超出文本区域，局部渲染需要包含这部分像素
+ANAN_REGION_PADDING = 48
+
+# 渲染预算默认值
+# 单次渲染的时间预算（秒），超时的渲染会被终止
+DEFAULT_RENDER_BUDGET_SECONDS = 10
+# 渲染工作进程数，0 表示与 CPU 核心数相同
+DEFAULT_RENDER_WORKERS = 0
+# 单次渲染允许的最大估算开销（字符数）
+# 实测每个字符约 16～28µs，5 万字符约 1.4s，为 10 秒预算留出余量（见 benchmarks/bench_cost.py）
+DEFAULT_MAX_RENDER_COST = 50000
+
+# 渲染路由默认值
+# 本地渲染后端数量，每个后端拥有独立的渲染进程池
+DEFAULT_RENDER_BACKENDS = 1
+# 一致性哈希环上每个后端的虚拟节点数
+DEFAULT_RENDER_VIRTUAL_NODES = 100
+# 渲染后端健康检查间隔（秒）
+DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS = 30
+# 归属后端故障时，每个请求最多转移到其他后端重试的次数
+# 限制重试次数可以避免一个会让工作进程崩溃的输入依次拖垮所有后端
+RENDER_FAILOVER_RETRIES = 1
+
+# 审判表情文本区域的外扩边距（像素）
+# NumPy 合成时所有文本在一个裁剪区域中绘制，裁剪区域需要包含字形超出文本区域的部分
+TRIAL_TEXT_PADDING = 48
+
+# 审判表情合成后端：sketchbook 为逐步调用 sketchbook 绘制，numpy 为 NumPy 画布合成
+TRIAL_BACKENDS = ("sketchbook", "numpy")
+DEFAULT_TRIAL_BACKEND = "sketchbook"
@@ -1,13 +1,18 @@
+import io
 import math
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, List, Tuple
 
+from PIL import Image
 from sketchbook import (
     Drawer,  # type: ignore
     TextStyle,  # type: ignore
     PasteStyle,  # type: ignore
     DrawerRegion,  # type: ignore
     TextFitDrawer,  # type: ignore
+    ImageFitPaster,  # type: ignore
 )
 
 from .models import Character, Option, Statement
@@ -21,6 +26,7 @@ from .constants import (
     OPTION_START_Y,
     OPTION_END_Y,
     MAX_PADDING,
+    OPTION_MIN_SPACING,
     MAX_OPTIONS_COUNT,
     STATEMENT_ICON_WIDTH,
     STATEMENT_ICON_HEIGHT,
@@ -37,10 +43,12 @@ from .constants import (
     ANAN_REGION_Y,
     ANAN_REGION_WIDTH,
     ANAN_REGION_HEIGHT,
+    ANAN_REGION_PADDING,
 )
 
 
 PLUGIN_PATH = Path(__file__).parent
+ANAN_FONT = str(PLUGIN_PATH / "assets/fonts/SourceHanSansSC-Bold.otf")
 
 
 def get_anan_base_image(face: Optional[str] = None) -> str:
@@ -69,9 +77,118 @@ def get_anan_base_image(face: Optional[str] = None) -> str:
     return str(PLUGIN_PATH / "assets/anan" / f"{safe_face}.png")
 
 
+@dataclass(frozen=True)
+class AnanCanvas:
+    """Prebaked images for rendering only the sketchbook region of Anan
+
+    Attributes:
+        frame (bytes): The full face image with the overlay composited on top
+        face_region (bytes): The face image cropped to the padded text region
+        overlay_region (bytes): The overlay image cropped to the padded text region
+        box (Tuple[int, int, int, int]): The padded text region in the full image
+        text_region (Tuple[int, int, int, int]): The text region relative to the box
+    """
+
+    frame: bytes
+    face_region: bytes
+    overlay_region: bytes
+    box: Tuple[int, int, int, int]
+    text_region: Tuple[int, int, int, int]
+
+
+def _encode_raw(image: Image.Image) -> bytes:
+    """Encode an image as uncompressed TIFF, which is much cheaper to decode than PNG"""
+    buffer = io.BytesIO()
+    image.save(buffer, format="TIFF")
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=None)
+def get_anan_canvas(face: Optional[str] = None) -> AnanCanvas:
+    """Get the prebaked canvas for Anan's face, building it on first use
+
+    Args:
+        face (Optional[str], optional): The face type to be used. 
+                                       Available: 害羞, 生气, 病娇, 无语, 开心. 
+                                       Defaults to None.
+
+    Returns:
+        AnanCanvas: The prebaked canvas
+
+    Raises:
+        ValueError: If face is not in the whitelist
+    """
+    base_path = get_anan_base_image(face)
+    overlay_path = str(PLUGIN_PATH / "assets/anan/base_overlay.png")
+
+    # 使用 sketchbook 自身合成整张图，保证与完整渲染的像素一致
+    frame = Image.open(io.BytesIO(
+        Drawer(base_path, ANAN_FONT, overlay_image=overlay_path).render()
+    ))
+    with Image.open(base_path) as base, Image.open(overlay_path) as overlay:
+        width, height = base.size
+        box = (
+            max(0, ANAN_REGION_X - ANAN_REGION_PADDING),
+            max(0, ANAN_REGION_Y - ANAN_REGION_PADDING),
+            min(width, ANAN_REGION_X + ANAN_REGION_WIDTH + ANAN_REGION_PADDING),
+            min(height, ANAN_REGION_Y + ANAN_REGION_HEIGHT + ANAN_REGION_PADDING),
+        )
+        face_region = _encode_raw(base.convert("RGBA").crop(box))
+        overlay_region = _encode_raw(overlay.convert("RGBA").crop(box))
+
+    text_region = (
+        ANAN_REGION_X - box[0],
+        ANAN_REGION_Y - box[1],
+        ANAN_REGION_X + ANAN_REGION_WIDTH - box[0],
+        ANAN_REGION_Y + ANAN_REGION_HEIGHT - box[1],
+    )
+    return AnanCanvas(_encode_raw(frame), face_region, overlay_region, box, text_region)
+
+
+def prebake_anan_canvases():
+    """Build the prebaked canvases of all faces ahead of the first request"""
+    get_anan_canvas(None)
+    for face in FACE_WHITELIST:
+        get_anan_canvas(face)
+
+
 def draw_anan(text: str, face: Optional[str] = None) -> bytes:
     """Draw the image of what Anan says
 
+    只渲染素描本区域（含外扩边距）内的文本，
+    再将其贴回预合成的整张表情图，输出与 draw_anan_full_frame 像素一致。
+
+    Args:
+        text (str): The text to be drawn
+        face (Optional[str], optional): The face type to be used. 
+                                       Available: 害羞, 生气, 病娇, 无语, 开心. 
+                                       Defaults to None.
+
+    Returns:
+        bytes: The image bytes of the drawn image
+    """
+    canvas = get_anan_canvas(face)
+    region_bytes = TextFitDrawer(
+        base_image=canvas.face_region,
+        font=ANAN_FONT,
+        overlay_image=canvas.overlay_region,
+        region=DrawerRegion(*canvas.text_region),
+    ).draw(
+        text=text,
+        style=TextStyle(color=(0, 0, 0, 255)),
+    )
+    # 文本区域图不透明，keep_alpha 粘贴即为逐像素替换
+    return ImageFitPaster(
+        canvas.frame,
+        region=DrawerRegion(*canvas.box),
+    ).paste(region_bytes, PasteStyle(keep_alpha=True))
+
+
+def draw_anan_full_frame(text: str, face: Optional[str] = None) -> bytes:
+    """Draw the image of what Anan says by rendering the whole image
+
+    This is the reference renderer for draw_anan.
+
     Args:
         text (str): The text to be drawn
         face (Optional[str], optional): The face type to be used. 
@@ -83,7 +200,7 @@ def draw_anan(text: str, face: Optional[str] = None) -> bytes:
     """
     drawer = TextFitDrawer(
         base_image=get_anan_base_image(face),
-        font=str(PLUGIN_PATH / "assets/fonts/SourceHanSansSC-Bold.otf"),
+        font=ANAN_FONT,
         overlay_image=str(PLUGIN_PATH / "assets/anan/base_overlay.png"),
         region=DrawerRegion(
             ANAN_REGION_X, 
@@ -163,11 +280,8 @@ def get_option_coordinates(number: int) -> List[Tuple[int, int]]:
     if number <= 0:
         raise ValueError("选项数量必须大于 0")
     
-    # 最小间距（确保选项不会挤在一起）
-    MIN_SPACING = 20
-    
     # 计算所需的总高度（选项高度 + 最小间距）
-    total_layout_height = number * OPTION_HEIGHT + (number - 1) * MIN_SPACING
+    total_layout_height = number * OPTION_HEIGHT + (number - 1) * OPTION_MIN_SPACING
     
     # 计算可用高度
     available_height = OPTION_END_Y - OPTION_START_Y
@@ -184,13 +298,52 @@ def get_option_coordinates(number: int) -> List[Tuple[int, int]]:
     else:
         start_y = OPTION_START_Y + (available_height - total_layout_height) // 2
     
-    # 生成选项坐标，每个选项之间保持 MIN_SPACING 间距
+    # 生成选项坐标，每个选项之间保持 OPTION_MIN_SPACING 间距
     return [
-        (OPTION_START_X, start_y + i * (OPTION_HEIGHT + MIN_SPACING))
+        (OPTION_START_X, start_y + i * (OPTION_HEIGHT + OPTION_MIN_SPACING))
         for i in range(number)
     ]
 
 
+def get_options_per_page() -> int:
+    """Get the number of options that fit in one trial image
+
+    选项超出可用范围时从 OPTION_START_Y 开始向下排列，
+    因此一页最多容纳从 OPTION_START_Y 到图片底部之间能完整放下的选项。
+
+    Returns:
+        int: The maximum number of options in one image
+    """
+    available_height = TRIAL_IMAGE_HEIGHT - OPTION_START_Y + OPTION_MIN_SPACING
+    return max(1, available_height // (OPTION_HEIGHT + OPTION_MIN_SPACING))
+
+
+def paginate_options(options: List[Option]) -> List[List[Option]]:
+    """Split options into pages that fit the trial layout
+
+    各页的选项数量尽量平均（例如 4 个选项分为 2 + 2 而不是 3 + 1），并保持原有顺序。
+
+    Args:
+        options (List[Option]): The options to be split
+
+    Returns:
+        List[List[Option]]: The options of each page
+    """
+    per_page = get_options_per_page()
+    page_count = math.ceil(len(options) / per_page)
+    if page_count <= 1:
+        return [options]
+
+    base, extra = divmod(len(options), page_count)
+    pages = []
+    start = 0
+    for i in range(page_count):
+        size = base + (1 if i < extra else 0)
+        pages.append(options[start:start + size])
+        start += size
+    return pages
+
+
 def draw_trial(character: Character, options: List[Option]) -> bytes:
     """Draw the trial image for a character saying an option
 
@@ -0,0 +1,190 @@
+"""事件循环阻塞检测
+
+此模块提供可选启用的事件循环看门狗，包括：
+- LoopWatchdog: 通过心跳任务测量事件循环延迟，
+  在延迟超过阈值时从独立线程抓取事件循环线程的调用栈，
+  将卡顿归因到对应的插件处理器，并按调用位置限频输出日志
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from astrbot.api import logger
+
+
+PLUGIN_PATH = Path(__file__).parent
+
+# 日志中保留的调用栈帧数
+MAX_STACK_FRAMES = 12
+
+
+@dataclass
+class _Stall:
+    """A stall of the event loop that is still in progress
+
+    Attributes:
+        handler (str): The name of the plugin handler that was running
+        location (str): The innermost plugin frame as "file:line in func"
+        stack (List[str]): The formatted stack captured during the stall
+        lag (float): The largest lag observed so far in seconds
+    """
+
+    handler: str
+    location: str
+    stack: List[str]
+    lag: float
+
+
+class LoopWatchdog:
+    """Detect event loop stalls caused by plugin code
+
+    心跳任务在事件循环中周期性更新时间戳；监控线程发现时间戳超过阈值未更新时，
+    说明事件循环线程正被同步代码占用，此时抓取其调用栈进行归因。
+    只有调用栈中包含插件代码的卡顿才会被记录。
+
+    Args:
+        threshold (float): The loop lag in seconds above which a stall is reported
+        log_interval (float): The minimum interval in seconds between two logs
+                              for the same handler and location
+        handlers (Iterable[Callable]): The plugin handlers used for attribution
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        log_interval: float,
+        handlers: Iterable[Callable],
+    ):
+        if threshold <= 0:
+            raise ValueError("阻塞检测阈值必须大于 0")
+
+        self.threshold = threshold
+        self.log_interval = log_interval
+        # 心跳间隔取阈值的一半，且最长不超过 50ms，
+        # 即使阈值较大，卡顿开始时刻的误差也不超过 50ms
+        self.interval = min(threshold / 2, 0.05)
+        self._handler_codes = {}
+        for handler in handlers:
+            func = getattr(handler, "__func__", handler)
+            code = getattr(func, "__code__", None)
+            if code is not None:
+                self._handler_codes[code] = func.__name__
+
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._monitor_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # (handler, location) -> (上次输出日志的时间, 期间被抑制的次数)
+        self._last_logged: Dict[Tuple[str, str], Tuple[float, int]] = {}
+
+    def start(self):
+        """Start the watchdog, must be called from a coroutine on the monitored loop"""
+        if self._heartbeat_task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._monitor_thread = threading.Thread(
+            target=self._monitor, name="manosaba-loop-watchdog", daemon=True
+        )
+        self._monitor_thread.start()
+        logger.info(f"事件循环阻塞检测已启用，阈值 {self.threshold * 1000:.0f}ms")
+
+    async def stop(self):
+        """Stop the watchdog"""
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._monitor_thread is not None:
+            self._monitor_thread.join(timeout=1)
+            self._monitor_thread = None
+
+    async def _heartbeat(self):
+        """Periodically record that the event loop is responsive"""
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _monitor(self):
+        """Watch the heartbeat from a separate thread and attribute stalls"""
+        stall: Optional[_Stall] = None
+        stall_beat = 0.0
+        while not self._stop.wait(self.interval):
+            last_beat = self._last_beat
+            lag = time.monotonic() - last_beat - self.interval
+
+            if stall is not None:
+                if last_beat != stall_beat:
+                    # 心跳已恢复，卡顿结束
+                    self._report(stall)
+                    stall = None
+                else:
+                    stall.lag = max(stall.lag, lag)
+                    continue
+
+            if lag > self.threshold:
+                stall = self._capture(lag)
+                stall_beat = last_beat
+
+    def _capture(self, lag: float) -> Optional[_Stall]:
+        """Capture the stack of the event loop thread and attribute it
+
+        Args:
+            lag (float): The lag observed so far in seconds
+
+        Returns:
+            Optional[_Stall]: The stall, or None if no plugin code is on the stack
+        """
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+
+        handler = None
+        location = None
+        current = frame
+        while current is not None:
+            code = current.f_code
+            if location is None and Path(code.co_filename).parent == PLUGIN_PATH:
+                location = (
+                    f"{Path(code.co_filename).name}:{current.f_lineno} in {code.co_name}"
+                )
+            # 继续向外层查找，取最外层的处理器
+            if code in self._handler_codes:
+                handler = self._handler_codes[code]
+            current = current.f_back
+
+        if location is None:
+            return None
+
+        stack = traceback.format_list(traceback.extract_stack(frame)[-MAX_STACK_FRAMES:])
+        return _Stall(handler or "<未知处理器>", location, stack, lag)
+
+    def _report(self, stall: _Stall):
+        """Log a finished stall, rate limited per handler and location"""
+        key = (stall.handler, stall.location)
+        now = time.monotonic()
+        last_time, suppressed = self._last_logged.get(key, (0.0, 0))
+        if now - last_time < self.log_interval:
+            self._last_logged[key] = (last_time, suppressed + 1)
+            return
+
+        self._last_logged[key] = (now, 0)
+        suppressed_note = f"（此前 {suppressed} 次同类卡顿已被抑制）" if suppressed else ""
+        logger.warning(
+            f"事件循环被阻塞约 {(stall.lag + self.interval) * 1000:.0f}ms，"
+            f"处理器: {stall.handler}，位置: {stall.location}{suppressed_note}\n"
+            + "".join(stall.stack)
+        )
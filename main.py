@@ -2,17 +2,53 @@ import re
 import tempfile
 import asyncio
 import json
+import os
+import time
 from collections import defaultdict
 from pathlib import Path
+from typing import Callable, List, Optional
 
 from astrbot.api.event import filter, AstrMessageEvent
 from astrbot.api.star import Context, Star, StarTools
-from astrbot.api import logger
+from astrbot.api import logger, AstrBotConfig
+import astrbot.api.message_components as Comp
 
 from .models import Option, Character
-from .drawer import draw_anan, draw_trial, MAX_OPTIONS_COUNT
-from .utils import get_statement, get_character
-from .constants import FACE_WHITELIST
+from .drawer import (
+    draw_anan,
+    draw_trial,
+    paginate_options,
+    prebake_anan_canvases,
+    MAX_OPTIONS_COUNT,
+)
+from .utils import (
+    get_statement,
+    get_character,
+    get_anan_render_key,
+    get_trial_render_key,
+)
+from .constants import (
+    FACE_WHITELIST,
+    MAX_PAGED_OPTIONS_COUNT,
+    DEFAULT_RENDER_BUDGET_SECONDS,
+    DEFAULT_RENDER_WORKERS,
+    DEFAULT_RENDER_BACKENDS,
+    DEFAULT_RENDER_VIRTUAL_NODES,
+    DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS,
+    DEFAULT_MAX_RENDER_COST,
+    DEFAULT_TRIAL_BACKEND,
+    TRIAL_BACKENDS,
+)
+from .loop_watchdog import LoopWatchdog
+from .render_pool import RenderPool
+from .render_router import RenderRouter, LocalRenderBackend
+from .render_cost import prepare_anan_text, prepare_trial_options
+from .render_profiler import RenderProfilerConfig, profiled_render
+from .trial_compositor import (
+    draw_trial_numpy,
+    prebake_trial_assets,
+    is_available as is_numpy_available,
+)
 
 
 class ManosabaMemesPlugin(Star):
@@ -37,10 +73,65 @@ class ManosabaMemesPlugin(Star):
       别名: manosaba帮助, 魔裁help
     """
     
-    def __init__(self, context: Context):
+    def __init__(self, context: Context, config: Optional[AstrBotConfig] = None):
         super().__init__(context)
+        self.config = config if config is not None else {}
         self.character_map = defaultdict(lambda: Character.EMA)
         self.data_file = None  # 将在 initialize 中设置
+        self.watchdog = None  # 启用阻塞检测时在 initialize 中创建
+
+        render_config = self.config.get("render", {})
+        self.max_render_cost = render_config.get("max_cost", DEFAULT_MAX_RENDER_COST)
+        # 每个渲染后端拥有独立的渲染进程池，按渲染键的一致性哈希分发请求
+        # 工作进程在首次渲染时启动，并在启动时预合成安安说各表情的底图
+        workers = render_config.get("workers", DEFAULT_RENDER_WORKERS) or os.cpu_count() or 1
+        budget = render_config.get("budget_s", DEFAULT_RENDER_BUDGET_SECONDS)
+        self.draw_trial = self._select_trial_renderer(
+            render_config.get("trial_backend", DEFAULT_TRIAL_BACKEND)
+        )
+        # 使用 NumPy 合成时同时预构建审判表情包的画布与素材
+        initializer = (
+            prebake_trial_assets if self.draw_trial is draw_trial_numpy
+            else prebake_anan_canvases
+        )
+        self.render_router = RenderRouter(
+            backends=[
+                LocalRenderBackend(
+                    f"local-{i}",
+                    RenderPool(workers, budget, initializer=initializer),
+                )
+                for i in range(render_config.get("backends", DEFAULT_RENDER_BACKENDS))
+            ],
+            replicas=render_config.get("virtual_nodes", DEFAULT_RENDER_VIRTUAL_NODES),
+            health_check_interval=render_config.get(
+                "health_check_interval_s", DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS
+            ),
+        )
+        # 选项过多时拆分为多张图片并发渲染
+        self.trial_pagination = self.config.get("trial_pagination", True)
+        self.profiler_config = None  # 启用性能分析时在 initialize 中创建
+
+    @staticmethod
+    def _select_trial_renderer(backend: str) -> Callable[..., bytes]:
+        """根据配置选择审判表情包的合成后端，配置无效或缺少依赖时回退到 sketchbook
+
+        Args:
+            backend (str): The configured backend name
+
+        Returns:
+            Callable[..., bytes]: The trial render function
+        """
+        if backend not in TRIAL_BACKENDS:
+            logger.warning(
+                f"未知的审判表情包合成后端: {backend}，可选: {', '.join(TRIAL_BACKENDS)}，"
+                f"将使用 {DEFAULT_TRIAL_BACKEND}"
+            )
+            backend = DEFAULT_TRIAL_BACKEND
+        if backend == "numpy":
+            if is_numpy_available():
+                return draw_trial_numpy
+            logger.warning("未安装 numpy，审判表情包将使用 sketchbook 合成")
+        return draw_trial
 
     async def initialize(self):
         """插件初始化方法"""
@@ -53,6 +144,36 @@ class ManosabaMemesPlugin(Star):
         
         # 加载用户角色偏好
         await self._load_character_preferences()
+
+        # 启动渲染后端健康检查
+        self.render_router.start()
+
+        # 启用慢渲染性能分析（可选）
+        profiler_config = self.config.get("render_profiler", {})
+        if profiler_config.get("enable", False):
+            self.profiler_config = RenderProfilerConfig(
+                output_dir=str(data_dir / "render_profiles"),
+                slow_threshold=profiler_config.get("slow_threshold_ms", 1000) / 1000,
+                sample_rate=profiler_config.get("sample_rate", 0.0),
+                max_files=profiler_config.get("max_files", 50),
+            )
+            logger.info(f"慢渲染性能分析已启用，输出目录: {self.profiler_config.output_dir}")
+
+        # 启动事件循环阻塞检测（可选）
+        watchdog_config = self.config.get("loop_watchdog", {})
+        if watchdog_config.get("enable", False):
+            self.watchdog = LoopWatchdog(
+                threshold=watchdog_config.get("threshold_ms", 100) / 1000,
+                log_interval=watchdog_config.get("log_interval_s", 60),
+                handlers=[
+                    self.handle_anan_says,
+                    self.handle_trial,
+                    self.handle_switch_character,
+                    self.handle_help,
+                    self.terminate,
+                ],
+            )
+            self.watchdog.start()
         
         logger.info("魔裁 Memes 插件已加载")
 
@@ -119,8 +240,10 @@ class ManosabaMemesPlugin(Star):
         text = text.replace("\\n", "\n")
         
         try:
-            loop = asyncio.get_event_loop()
-            image_bytes = await loop.run_in_executor(None, draw_anan, text, face)
+            text = prepare_anan_text(text, self.max_render_cost)
+            image_bytes = await self._render(
+                get_anan_render_key(text, face), draw_anan, text, face
+            )
             with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as f:
                 f.write(image_bytes)
                 temp_path = f.name
@@ -128,6 +251,9 @@ class ManosabaMemesPlugin(Star):
                 yield event.image_result(temp_path)
             finally:
                 Path(temp_path).unlink(missing_ok=True)
+        except ValueError as e:
+            # 捕获渲染开销超限、渲染超时等业务级错误
+            yield event.plain_result(str(e))
         except Exception as e:
             logger.error(f"生成安安说话图片失败: {e}")
             yield event.plain_result(f"生成图片失败: {str(e)}")
@@ -140,7 +266,7 @@ class ManosabaMemesPlugin(Star):
         角色名可选: 梅露露, 诺亚, 汉娜, 奈叶香, 亚里沙, 米莉亚, 雪莉, 艾玛, 玛格, 安安, 可可, 希罗, 蕾雅
         可发送多行以添加多个选项
 
-        注意：最多支持 10 个选项
+        注意：每张图片最多 3 个选项，超出时自动分页为多张图片，最多支持 30 个选项
         """
         message_str = event.message_str
         matches = re.findall(
@@ -160,34 +286,101 @@ class ManosabaMemesPlugin(Star):
                 return
 
         # 前置校验：检查选项数量
-        if len(options) > MAX_OPTIONS_COUNT:
-            yield event.plain_result(f"选项数量过多，最多支持 {MAX_OPTIONS_COUNT} 个选项")
+        max_options_count = (
+            MAX_PAGED_OPTIONS_COUNT if self.trial_pagination else MAX_OPTIONS_COUNT
+        )
+        if len(options) > max_options_count:
+            yield event.plain_result(f"选项数量过多，最多支持 {max_options_count} 个选项")
             return
         
         if len(options) == 0:
             yield event.plain_result("请至少输入一个选项")
             return
 
+        pages = paginate_options(options) if self.trial_pagination else [options]
+        temp_paths = []
         try:
-            loop = asyncio.get_event_loop()
-            image_bytes = await loop.run_in_executor(
-                None, draw_trial, self.character_map[event.get_session_id()], options
+            pages = [prepare_trial_options(page, self.max_render_cost) for page in pages]
+            images = await self._render_trial_pages(
+                self.character_map[event.get_session_id()], pages
             )
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as f:
-                f.write(image_bytes)
-                temp_path = f.name
-            try:
-                yield event.image_result(temp_path)
-            finally:
-                Path(temp_path).unlink(missing_ok=True)
+            for image_bytes in images:
+                with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as f:
+                    f.write(image_bytes)
+                    temp_paths.append(f.name)
+            if len(temp_paths) == 1:
+                yield event.image_result(temp_paths[0])
+            else:
+                yield event.chain_result(
+                    [Comp.Image.fromFileSystem(path) for path in temp_paths]
+                )
         except ValueError as e:
-            # 捕获选项数量等业务级错误
+            # 捕获选项数量、渲染开销超限、渲染超时等业务级错误
             yield event.plain_result(str(e))
         except OverflowError:
             yield event.plain_result("选项过多，请减少选项数量")
         except Exception as e:
             logger.error(f"生成审判图片失败: {e}")
             yield event.plain_result(f"生成图片失败: {str(e)}")
+        finally:
+            for path in temp_paths:
+                Path(path).unlink(missing_ok=True)
+
+    async def _render(
+        self, render_key: str, func: Callable[..., bytes], *args
+    ) -> bytes:
+        """按渲染键路由到渲染后端执行渲染，启用性能分析时由 cProfile 包装
+
+        Args:
+            render_key (str): The canonical key of the render request
+            func (Callable[..., bytes]): The render function
+            *args: The arguments of the render function
+
+        Returns:
+            bytes: The rendered image bytes
+        """
+        if self.profiler_config is not None:
+            return await self.render_router.submit(
+                render_key, profiled_render, self.profiler_config, render_key, func, *args
+            )
+        return await self.render_router.submit(render_key, func, *args)
+
+    async def _render_trial_pages(
+        self, character: Character, pages: List[List[Option]]
+    ) -> List[bytes]:
+        """并发渲染审判表情包的各页，并记录页数与每页耗时
+
+        Args:
+            character (Character): The character who is speaking
+            pages (List[List[Option]]): The options of each page
+
+        Returns:
+            List[bytes]: The image bytes of each page, in page order
+        """
+        async def render_page(page: List[Option]):
+            page_start = time.perf_counter()
+            image_bytes = await self._render(
+                get_trial_render_key(character, page), self.draw_trial, character, page
+            )
+            return image_bytes, time.perf_counter() - page_start
+
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(render_page(page)) for page in pages]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # 任一页失败后请求已经以错误回复，取消其余仍在渲染的页，释放它们占用的渲染槽位
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        if len(pages) > 1:
+            page_times = ", ".join(f"{elapsed:.2f}s" for _, elapsed in results)
+            logger.info(
+                f"审判表情包分页渲染完成: {len(pages)} 页，"
+                f"总耗时 {time.perf_counter() - start:.2f}s，各页耗时 [{page_times}]"
+            )
+        return [image_bytes for image_bytes, _ in results]
 
     @filter.command("切换角色")
     async def handle_switch_character(self, event: AstrMessageEvent):
@@ -234,7 +427,7 @@ class ManosabaMemesPlugin(Star):
 说明: 生成审判时的选项图片，支持多行输入生成多个选项
 类型: 疑问, 反驳, 伪证, 赞同, 魔法
 魔法角色: 梅露露, 诺亚, 汉娜, 奈叶香, 亚里沙, 米莉亚, 雪莉, 艾玛, 玛格, 安安, 可可, 希罗, 蕾雅
-注意：最多支持 10 个选项
+注意：每张图片最多 3 个选项，超出时自动分页，最多支持 30 个选项
 示例: 【伪证】我和艾玛不是恋人
 示例: 【魔法: 诺亚】液体操控  （冒号后可以有空格）
 
@@ -247,7 +440,7 @@ class ManosabaMemesPlugin(Star):
 💡 小贴士:
 • 在文本中输入 \\n 可以换行
 • 中括号【】中的内容会被渲染成紫色
-• 选项数量建议 3 条以内效果最佳，最多支持 10 条
+• 选项超过 3 条时会自动分页为多张图片，最多支持 30 条
 • 角色选择会自动保存，重启后依然有效
 • 角色名和表情名会自动去除首尾空格，支持常见输入格式"""
         yield event.plain_result(help_text)
@@ -256,4 +449,8 @@ class ManosabaMemesPlugin(Star):
         """插件销毁方法"""
         # 保存用户偏好
         await self._save_character_preferences()
+        await self.render_router.shutdown()
+        if self.watchdog is not None:
+            await self.watchdog.stop()
+            self.watchdog = None
         logger.info("魔裁 Memes 插件已卸载")
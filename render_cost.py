@@ -0,0 +1,105 @@
+"""渲染开销估算
+
+此模块在渲染前粗略估算文本适配绘制的开销，包括：
+- estimate_text_cost: 估算单段文本的渲染开销
+- prepare_anan_text / prepare_trial_options: 简化或拒绝开销超出上限的输入
+
+实测渲染耗时由固定的图片合成开销与随字符数线性增长的排版开销组成，
+【】括号与换行并不比普通字符更贵（见 benchmarks/bench_cost.py），因此开销按字符数估算。
+"""
+
+import re
+from typing import List
+
+from .models import Option
+
+
+class RenderCostError(ValueError):
+    """Raised when an input is estimated to be too expensive to render"""
+
+    def __init__(self, cost: int, limit: int):
+        super().__init__(
+            f"文本过长（估算渲染开销 {cost}，上限 {limit}），请缩短文本"
+        )
+        self.cost = cost
+        self.limit = limit
+
+
+def estimate_text_cost(text: str) -> int:
+    """Estimate the cost of fitting a text into a region
+
+    Args:
+        text (str): The text to be drawn
+
+    Returns:
+        int: The estimated cost, in characters
+    """
+    return len(text)
+
+
+def simplify_text(text: str) -> str:
+    """Simplify a text without changing what it says
+
+    此函数会：
+    1. 去除空的高亮括号
+    2. 将连续的多个空行合并为一个空行
+    3. 去除每行末尾的空白
+
+    Args:
+        text (str): The text to be simplified
+
+    Returns:
+        str: The simplified text
+    """
+    text = re.sub(r"【\s*】|\[\s*\]", "", text)
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", text).strip("\n")
+
+
+def prepare_anan_text(text: str, limit: int) -> str:
+    """Check the cost of an anan text, simplifying it if needed
+
+    Args:
+        text (str): The text to be drawn
+        limit (int): The maximum allowed cost, 0 or less to disable the check
+
+    Returns:
+        str: The text to render, simplified if it was over the limit
+
+    Raises:
+        RenderCostError: If the text is still over the limit after simplification
+    """
+    if limit <= 0 or estimate_text_cost(text) <= limit:
+        return text
+
+    simplified = simplify_text(text)
+    cost = estimate_text_cost(simplified)
+    if cost > limit:
+        raise RenderCostError(cost, limit)
+    return simplified
+
+
+def prepare_trial_options(options: List[Option], limit: int) -> List[Option]:
+    """Check the total cost of trial options, simplifying them if needed
+
+    Args:
+        options (List[Option]): The options to be drawn in one image
+        limit (int): The maximum allowed total cost, 0 or less to disable the check
+
+    Returns:
+        List[Option]: The options to render, simplified if they were over the limit
+
+    Raises:
+        RenderCostError: If the options are still over the limit after simplification
+    """
+    if limit <= 0 or sum(estimate_text_cost(o.text) for o in options) <= limit:
+        return options
+
+    # 文本只由空括号组成时简化后为空，此时保留原文本
+    simplified = [
+        Option(o.statement, simplify_text(o.text).strip() or o.text) for o in options
+    ]
+    cost = sum(estimate_text_cost(o.text) for o in simplified)
+    if cost > limit:
+        raise RenderCostError(cost, limit)
+    return simplified
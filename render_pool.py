@@ -0,0 +1,270 @@
+"""渲染进程池
+
+此模块在独立的工作进程中执行图片渲染，包括：
+- RenderPool: 固定数量的渲染工作进程，每次渲染都有时间预算
+- RenderTimeoutError: 渲染超出时间预算时抛出的异常
+- RenderWorkerError: 工作进程意外退出或通信管道断开时抛出的异常
+
+渲染超时后会直接终止对应的工作进程并重新拉起一个新进程，
+因此即使 sketchbook 的原生代码陷入长时间计算也能真正取消，不会一直占用渲染槽位。
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from astrbot.api import logger
+
+from .render_worker import ping, run_worker
+
+
+class RenderTimeoutError(ValueError):
+    """Raised when a render runs over its time budget and is cancelled"""
+
+    def __init__(self, budget: float):
+        super().__init__(
+            f"图片渲染超时（超过 {budget:g} 秒）已被取消，请缩短文本后重试"
+        )
+        self.budget = budget
+
+
+class RenderWorkerError(RuntimeError):
+    """Raised when a render worker process dies or its pipe breaks
+
+    只表示工作进程或管道本身的故障；渲染函数在工作进程中抛出的异常（包括 OSError）
+    会原样在主进程中重新抛出，不会被转换为此异常。
+    """
+
+    pass
+
+
+class _RenderWorker:
+    """A render worker process and the pipe used to talk to it"""
+
+    def __init__(self, initializer: Optional[Callable[[], Any]]):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=run_worker,
+            args=(child_conn, initializer),
+            name="manosaba-render-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        # 等待预热完成，避免预热耗时计入首次渲染的时间预算
+        try:
+            self.conn.recv()
+        except (EOFError, OSError) as e:
+            self.kill()
+            self.reap()
+            raise RenderWorkerError(f"渲染进程启动失败: {e!r}") from e
+
+    def call(self, func: Callable[..., bytes], args: tuple, budget: float) -> bytes:
+        """Run a render in the worker and wait at most budget seconds for it
+
+        Raises:
+            RenderTimeoutError: If the render does not finish within the budget
+            RenderWorkerError: If the worker dies or the pipe breaks
+        """
+        try:
+            self.conn.send((func, args))
+            if not self.conn.poll(budget):
+                raise RenderTimeoutError(budget)
+            ok, value = self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise RenderWorkerError(f"渲染进程意外退出或管道断开: {e!r}") from e
+        if not ok:
+            raise value
+        return value
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def close(self):
+        """Ask the worker to exit"""
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.conn.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+            self.reap()
+
+    def kill(self):
+        """Terminate the worker immediately without waiting for it to exit"""
+        self.process.kill()
+
+    def reap(self):
+        """Wait for a killed worker to exit and release its pipe, blocking"""
+        self.process.join()
+        self.conn.close()
+
+
+class RenderPool:
+    """A pool of render worker processes with a per-render time budget
+
+    工作进程在首次使用时才会启动，同一时刻每个进程只执行一个渲染。
+    等待工作进程的阻塞操作在进程池自己的线程池中执行，不占用事件循环共享的默认线程池。
+
+    Args:
+        workers (int): The number of worker processes
+        budget (float): The time budget of a single render in seconds
+        initializer (Optional[Callable[[], Any]]): A picklable function run once
+                                                   in each new worker, e.g. to warm caches
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        budget: float,
+        initializer: Optional[Callable[[], Any]] = None,
+    ):
+        if workers <= 0:
+            raise ValueError("渲染进程数必须大于 0")
+        if budget <= 0:
+            raise ValueError("渲染时间预算必须大于 0")
+
+        self.workers = workers
+        self.budget = budget
+        self.initializer = initializer
+        self._slots: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._spawned = []
+
+    def _get_slots(self) -> asyncio.Queue:
+        # 队列需要在事件循环中创建，因此延迟到首次使用时
+        if self._slots is None:
+            self._slots = asyncio.Queue()
+            for _ in range(self.workers):
+                self._slots.put_nowait(None)
+        return self._slots
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # 每个槽位同一时刻最多有一个线程在启动或等待工作进程，
+        # 另留同样数量的线程给被终止的工作进程收尾，避免与新的渲染互相排队
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers * 2,
+                thread_name_prefix="manosaba-render",
+            )
+        return self._executor
+
+    async def submit(self, func: Callable[..., bytes], *args) -> bytes:
+        """Render in a worker process within the time budget
+
+        Args:
+            func (Callable[..., bytes]): A picklable module-level render function
+            *args: The arguments of the render function
+
+        Returns:
+            bytes: The rendered image bytes
+
+        Raises:
+            RenderTimeoutError: If the render runs over the time budget
+            RenderWorkerError: If the worker cannot be started, dies, or its pipe breaks
+        """
+        loop = asyncio.get_running_loop()
+        slots = self._get_slots()
+        worker: Optional[_RenderWorker] = await slots.get()
+        release_slot = True
+        try:
+            if worker is not None and not worker.is_alive():
+                self._discard(worker)
+                worker = None
+            if worker is None:
+                spawn = loop.run_in_executor(self._get_executor(), self._spawn)
+                try:
+                    worker = await asyncio.shield(spawn)
+                except asyncio.CancelledError:
+                    # 请求被取消时工作进程仍在启动，启动完成后再由它归还槽位，
+                    # 否则该进程会脱离槽位，下次使用槽位时又多启动一个进程
+                    spawn.add_done_callback(partial(self._return_spawned, slots))
+                    release_slot = False
+                    raise
+            start = time.perf_counter()
+            try:
+                return await loop.run_in_executor(
+                    self._get_executor(), worker.call, func, args, self.budget
+                )
+            except RenderTimeoutError:
+                logger.warning(
+                    f"渲染 {getattr(func, '__name__', func)} 超时"
+                    f"（{time.perf_counter() - start:.2f}s），已终止工作进程"
+                )
+                self._discard(worker)
+                worker = None
+                raise
+            except RenderWorkerError:
+                # 工作进程已退出或管道已断开，下次使用该槽位时重新启动
+                self._discard(worker)
+                worker = None
+                raise
+            except asyncio.CancelledError:
+                # 请求被取消时工作进程仍在渲染，无法复用，直接终止
+                self._discard(worker)
+                worker = None
+                raise
+        finally:
+            if release_slot:
+                slots.put_nowait(worker)
+
+    @staticmethod
+    def _return_spawned(slots: asyncio.Queue, spawn: asyncio.Future):
+        """Put a worker whose start outlived a cancelled request back into its slot"""
+        if spawn.cancelled() or spawn.exception() is not None:
+            slots.put_nowait(None)
+        else:
+            slots.put_nowait(spawn.result())
+
+    async def health_check(self) -> bool:
+        """Check that the pool can start a worker and get an answer from it
+
+        所有工作进程都在渲染时说明进程池正常工作，直接视为健康，不等待空闲槽位；
+        否则借用一个空闲槽位，按需重新启动已退出的工作进程，并发送一个空任务。
+
+        Returns:
+            bool: Whether a worker answered within the time budget
+        """
+        if self._get_slots().empty():
+            return True
+        try:
+            await self.submit(ping)
+        except (RenderWorkerError, RenderTimeoutError):
+            return False
+        return True
+
+    def _discard(self, worker: _RenderWorker):
+        """Kill a worker that cannot be reused
+
+        终止信号立即发出，等待进程退出的阻塞操作放到线程池中执行，避免阻塞事件循环。
+        """
+        worker.kill()
+        if worker in self._spawned:
+            self._spawned.remove(worker)
+        asyncio.get_running_loop().run_in_executor(self._get_executor(), worker.reap)
+
+    def _spawn(self) -> _RenderWorker:
+        worker = _RenderWorker(self.initializer)
+        self._spawned.append(worker)
+        return worker
+
+    def _close_spawned(self):
+        while self._spawned:
+            self._spawned.pop().close()
+
+    def shutdown(self):
+        """Stop all worker processes and the threads waiting on them"""
+        self._close_spawned()
+        if self._executor is not None:
+            # 工作进程已全部退出，等待它们的线程会很快结束；
+            # 仍在启动的工作进程会在线程结束前加入列表，随后一并关闭
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._close_spawned()
+        self._slots = None
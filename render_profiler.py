@@ -0,0 +1,101 @@
+"""慢渲染性能分析
+
+此模块提供可选启用的渲染性能分析，包括：
+- RenderProfilerConfig: 性能分析配置
+- profiled_render: 在渲染工作进程中以 cProfile 运行渲染函数，
+  仅在渲染慢于阈值或命中采样率时将 pstats 文件写入输出目录，并限制目录中的文件数量
+
+渲染的大部分时间花在 sketchbook 的原生调用中，Python 层调用次数很少，
+因此 cProfile 的额外开销很小，且能将耗时归因到 sketchbook、Pillow 或插件自身的代码。
+可使用 `python -m pstats <文件>` 或 snakeviz 等工具查看生成的文件。
+"""
+
+import cProfile
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class RenderProfilerConfig:
+    """Configuration of the render profiler
+
+    Attributes:
+        output_dir (str): The directory where profile files are written
+        slow_threshold (float): Renders slower than this many seconds are written,
+                                0 or less to disable
+        sample_rate (float): The probability that any render is written regardless of duration
+        max_files (int): The maximum number of profile files kept in the output directory
+    """
+
+    output_dir: str
+    slow_threshold: float
+    sample_rate: float
+    max_files: int
+
+
+def _prune_profiles(output_dir: Path, max_files: int):
+    """Delete the oldest profile files so that at most max_files are kept"""
+    files = sorted(output_dir.glob("*.pstats"), key=lambda p: p.stat().st_mtime)
+    for path in files[:max(0, len(files) - max_files)]:
+        # 多个工作进程可能同时清理，文件已被删除时忽略
+        path.unlink(missing_ok=True)
+
+
+def _write_profile(
+    profiler: cProfile.Profile,
+    config: RenderProfilerConfig,
+    func_name: str,
+    render_key: str,
+    elapsed: float,
+    reason: str,
+):
+    """Write a profile to the output directory and prune old profiles"""
+    output_dir = Path(config.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    name = (
+        f"{time.strftime('%Y%m%d-%H%M%S')}_{func_name}_{render_key}"
+        f"_{elapsed * 1000:.0f}ms_{reason}.pstats"
+    )
+    profiler.dump_stats(str(output_dir / name))
+    _prune_profiles(output_dir, config.max_files)
+
+
+def profiled_render(
+    config: RenderProfilerConfig,
+    render_key: str,
+    func: Callable[..., bytes],
+    *args,
+) -> bytes:
+    """Run a render function under cProfile and keep the profile if it is interesting
+
+    Args:
+        config (RenderProfilerConfig): The profiler configuration
+        render_key (str): The canonical key of the render request, used in the file name
+        func (Callable[..., bytes]): The render function
+        *args: The arguments of the render function
+
+    Returns:
+        bytes: The image bytes returned by the render function
+    """
+    sampled = random.random() < config.sample_rate
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        return func(*args)
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        slow = 0 < config.slow_threshold <= elapsed
+        if slow or sampled:
+            try:
+                _write_profile(
+                    profiler, config, func.__name__, render_key, elapsed,
+                    "slow" if slow else "sampled",
+                )
+            except OSError:
+                # 写入失败不影响渲染结果
+                pass
@@ -0,0 +1,272 @@
+"""渲染路由
+
+此模块按渲染键将渲染请求分发到多个渲染后端，包括：
+- HashRing: 带虚拟节点的一致性哈希环
+- RenderBackend: 渲染后端基类，远程后端可继承此类实现
+- LocalRenderBackend: 本地渲染后端，使用渲染进程池或在当前进程中渲染
+- RenderRouter: 按一致性哈希选择后端，定期健康检查，后端故障时转移到环上的下一个后端重试一次
+
+相同的表情包总是落在同一个后端上，可以充分利用各后端本地的素材、文本适配与结果缓存；
+增加或移除后端时只有约 1/N 的渲染键会被重新映射。
+"""
+
+import asyncio
+import bisect
+import hashlib
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from astrbot.api import logger
+
+from .render_pool import RenderPool, RenderWorkerError
+from .constants import RENDER_FAILOVER_RETRIES
+
+
+class RenderBackendError(RuntimeError):
+    """Raised when a render backend cannot serve requests
+
+    只有后端本身的故障（进程崩溃、连接失败等）才应抛出此异常并触发故障转移；
+    文本过长、渲染超时等与输入相关的错误不会因为换一个后端而改变，应直接抛出。
+    """
+
+    pass
+
+
+def _hash(value: str) -> int:
+    """Map a string to a position on the hash ring"""
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """A consistent hash ring with virtual nodes
+
+    Args:
+        replicas (int): The number of virtual nodes per backend
+    """
+
+    def __init__(self, replicas: int = 100):
+        if replicas <= 0:
+            raise ValueError("虚拟节点数必须大于 0")
+        self.replicas = replicas
+        self._positions: List[int] = []
+        self._nodes: Dict[int, str] = {}
+
+    def add(self, node: str):
+        """Add a node and its virtual nodes to the ring"""
+        for i in range(self.replicas):
+            position = _hash(f"{node}#{i}")
+            # 哈希冲突极少出现，冲突时保留先加入的节点
+            if position in self._nodes:
+                continue
+            bisect.insort(self._positions, position)
+            self._nodes[position] = node
+
+    def remove(self, node: str):
+        """Remove a node and its virtual nodes from the ring"""
+        self._positions = [p for p in self._positions if self._nodes[p] != node]
+        self._nodes = {p: n for p, n in self._nodes.items() if n != node}
+
+    def iter_nodes(self, key: str) -> Iterator[str]:
+        """Iterate over the distinct nodes clockwise from the position of a key
+
+        第一个节点是该键的归属节点，后续节点依次作为故障转移的候选。
+        """
+        if not self._positions:
+            return
+        start = bisect.bisect(self._positions, _hash(key))
+        seen: Set[str] = set()
+        for i in range(len(self._positions)):
+            node = self._nodes[self._positions[(start + i) % len(self._positions)]]
+            if node not in seen:
+                seen.add(node)
+                yield node
+
+    def get_node(self, key: str) -> Optional[str]:
+        """Get the node a key belongs to, or None if the ring is empty"""
+        return next(self.iter_nodes(key), None)
+
+
+class RenderBackend(ABC):
+    """Base class of render backends
+
+    Args:
+        name (str): The unique name of the backend, used as its identity on the hash ring
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @abstractmethod
+    async def render(self, func: Callable[..., bytes], *args) -> bytes:
+        """Render an image
+
+        Raises:
+            RenderBackendError: If the backend cannot serve the request
+        """
+
+    async def health_check(self) -> bool:
+        """Check whether the backend can serve requests"""
+        return True
+
+    def shutdown(self):
+        """Release the resources of the backend"""
+        pass
+
+
+class LocalRenderBackend(RenderBackend):
+    """A render backend on this host
+
+    Args:
+        name (str): The unique name of the backend
+        pool (Optional[RenderPool]): The render pool to use; if None, renders run
+                                     in this process on the default executor,
+                                     which is useful as a stand-in for tests
+    """
+
+    def __init__(self, name: str, pool: Optional[RenderPool] = None):
+        super().__init__(name)
+        self.pool = pool
+        self._closed = False
+
+    async def render(self, func: Callable[..., bytes], *args) -> bytes:
+        if self._closed:
+            raise RenderBackendError(f"渲染后端 {self.name} 已关闭")
+        try:
+            if self.pool is None:
+                return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+            return await self.pool.submit(func, *args)
+        except RenderWorkerError as e:
+            # 只有工作进程或管道本身的故障属于后端故障，渲染函数抛出的异常原样向上传递
+            raise RenderBackendError(f"渲染后端 {self.name} 故障: {e}") from e
+
+    async def health_check(self) -> bool:
+        if self._closed:
+            return False
+        if self.pool is None:
+            return True
+        return await self.pool.health_check()
+
+    def shutdown(self):
+        self._closed = True
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+class RenderRouter:
+    """Route renders to backends by consistent hashing of the render key
+
+    Args:
+        backends (List[RenderBackend]): The render backends
+        replicas (int): The number of virtual nodes per backend
+        health_check_interval (float): Seconds between health checks, 0 or less to disable
+    """
+
+    def __init__(
+        self,
+        backends: List[RenderBackend],
+        replicas: int = 100,
+        health_check_interval: float = 30,
+    ):
+        self.ring = HashRing(replicas)
+        self.backends: Dict[str, RenderBackend] = {}
+        self.health_check_interval = health_check_interval
+        self._unhealthy: Set[str] = set()
+        self._health_task: Optional[asyncio.Task] = None
+        for backend in backends:
+            self.add_backend(backend)
+
+    def add_backend(self, backend: RenderBackend):
+        """Add a backend to the ring
+
+        Raises:
+            ValueError: If a backend with the same name already exists
+        """
+        if backend.name in self.backends:
+            raise ValueError(f"渲染后端名称重复: {backend.name}")
+        self.backends[backend.name] = backend
+        self.ring.add(backend.name)
+
+    def remove_backend(self, name: str) -> Optional[RenderBackend]:
+        """Remove a backend from the ring, returning it so the caller can shut it down"""
+        backend = self.backends.pop(name, None)
+        if backend is not None:
+            self.ring.remove(name)
+            self._unhealthy.discard(name)
+        return backend
+
+    async def submit(self, render_key: str, func: Callable[..., bytes], *args) -> bytes:
+        """Render on the backend the render key maps to, failing over if it is down
+
+        请求首先交给归属后端，失败时最多转移到环上后续的可用后端重试
+        RENDER_FAILOVER_RETRIES 次；所有后端都被标记为不可用时仍尝试归属后端，
+        避免一次故障后在下次健康检查前拒绝所有请求。渲染成功的后端会立即恢复为可用。
+
+        Args:
+            render_key (str): The canonical key of the render request
+            func (Callable[..., bytes]): The render function
+            *args: The arguments of the render function
+
+        Returns:
+            bytes: The rendered image bytes
+
+        Raises:
+            RenderBackendError: If no backend could serve the request
+        """
+        nodes = list(self.ring.iter_nodes(render_key))
+        if not nodes:
+            raise RenderBackendError("没有可用的渲染后端")
+        candidates = [name for name in nodes if name not in self._unhealthy] or nodes[:1]
+
+        error: Optional[RenderBackendError] = None
+        for name in candidates[:1 + RENDER_FAILOVER_RETRIES]:
+            try:
+                image_bytes = await self.backends[name].render(func, *args)
+            except RenderBackendError as e:
+                error = e
+                self._unhealthy.add(name)
+                logger.warning(f"{e}，已标记为不可用")
+                continue
+            if name in self._unhealthy:
+                self._unhealthy.discard(name)
+                logger.info(f"渲染后端 {name} 已恢复")
+            return image_bytes
+        raise error
+
+    def start(self):
+        """Start periodic health checks, must be called from a coroutine"""
+        if self.health_check_interval > 0 and self._health_task is None:
+            self._health_task = asyncio.get_running_loop().create_task(
+                self._health_check_loop()
+            )
+
+    async def _health_check_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.check_health()
+
+    async def check_health(self):
+        """Check all backends and update which of them receive requests"""
+        for name, backend in list(self.backends.items()):
+            try:
+                healthy = await backend.health_check()
+            except Exception:
+                healthy = False
+            if healthy and name in self._unhealthy:
+                self._unhealthy.discard(name)
+                logger.info(f"渲染后端 {name} 已恢复")
+            elif not healthy and name not in self._unhealthy:
+                self._unhealthy.add(name)
+                logger.warning(f"渲染后端 {name} 健康检查失败，已标记为不可用")
+
+    async def shutdown(self):
+        """Stop health checks and shut down all backends"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        loop = asyncio.get_running_loop()
+        for backend in self.backends.values():
+            await loop.run_in_executor(None, backend.shutdown)
@@ -0,0 +1,50 @@
+"""渲染工作进程入口
+
+此模块只包含渲染工作进程的主循环：
+- run_worker: 预热后循环接收渲染任务并返回结果
+- ping: 不做任何事的任务，用于健康检查
+
+工作进程以 spawn 方式启动，启动时只需导入此模块与渲染函数所在的模块，
+因此这里不能导入 astrbot，避免每个渲染进程都加载整个 AstrBot。
+"""
+
+from typing import Any, Callable, Optional
+
+
+def run_worker(conn, initializer: Optional[Callable[[], Any]]):
+    """Entry point of a render worker process
+
+    预热完成后发送就绪信号，然后循环接收 (func, args) 任务
+    并返回 (是否成功, 结果或异常)，收到 None 时退出。
+    """
+    if initializer is not None:
+        try:
+            initializer()
+        except Exception:
+            # 预热失败不影响渲染，渲染时会按需重新构建
+            pass
+    conn.send(None)
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+
+        func, args = task
+        try:
+            reply = (True, func(*args))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # 异常对象无法序列化时，退化为只携带错误信息的 RuntimeError
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+def ping() -> bytes:
+    """Do nothing, used by health checks to make sure a worker answers"""
+    return b""
@@ -0,0 +1,397 @@
+"""NumPy 审判表情合成
+
+此模块提供 draw_trial 的另一种合成实现，包括：
+- is_available: NumPy 是否可用
+- get_trial_base: 按角色缓存合成好的背景与立绘画布
+- prebake_trial_assets: 预先构建画布、素材与查找表，可作为渲染工作进程的预热函数
+- draw_trial_numpy: 与 draw_trial 参数相同、输出逐像素一致的审判表情绘制函数
+
+画布保存为一个可变的 NumPy 数组，素材只解码一次。贴图时完全不透明与完全透明的像素
+通过预先计算的查找表用切片赋值完成，只有半透明像素按 image-rs Rgba::blend 的
+单精度浮点公式逐像素计算；文本仍由 sketchbook 排版，所有选项的文本在一个裁剪区域中
+用一个 Drawer 一次绘制完成；最后只进行一次 PNG 编码。
+"""
+
+import io
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from PIL import Image
+from sketchbook import (
+    Drawer,  # type: ignore
+    TextStyle,  # type: ignore
+    PasteStyle,  # type: ignore
+    DrawerRegion,  # type: ignore
+    ImageFitPaster,  # type: ignore
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy 是可选依赖
+    np = None
+
+from .models import Character, Option, Statement
+from .drawer import (
+    PLUGIN_PATH,
+    get_option_coordinates,
+    get_statement_image,
+    prebake_anan_canvases,
+)
+from .constants import (
+    TRIAL_IMAGE_WIDTH,
+    TRIAL_IMAGE_HEIGHT,
+    MAX_OPTIONS_COUNT,
+    STATEMENT_ICON_WIDTH,
+    STATEMENT_ICON_HEIGHT,
+    STATEMENT_OFFSET_X,
+    STATEMENT_OFFSET_Y,
+    TEXT_OFFSET_X,
+    TEXT_OFFSET_Y,
+    TEXT_WIDTH,
+    TEXT_HEIGHT,
+    MAX_FONT_HEIGHT,
+    TEXT_COLOR,
+    BRACKET_COLOR,
+    TRIAL_TEXT_PADDING,
+)
+
+
+TRIAL_FONT = str(PLUGIN_PATH / "assets/fonts/SourceHanSerifSC.otf")
+OPTION_IMAGE = str(PLUGIN_PATH / "assets/trial/option.png")
+
+
+def is_available() -> bool:
+    """Check whether NumPy is installed"""
+    return np is not None
+
+
+def _decode(data: bytes) -> "np.ndarray":
+    """Decode image bytes into an RGBA array of shape (height, width, 4)"""
+    with Image.open(io.BytesIO(data)) as image:
+        return np.array(image.convert("RGBA"))
+
+
+def _encode_raw(array: "np.ndarray") -> bytes:
+    """Encode an RGBA array as uncompressed TIFF, which is much cheaper to decode than PNG"""
+    buffer = io.BytesIO()
+    Image.fromarray(array, "RGBA").save(buffer, format="TIFF")
+    return buffer.getvalue()
+
+
+def _blend(dst: "np.ndarray", src: "np.ndarray") -> "np.ndarray":
+    """Blend src over dst exactly like image-rs Rgba::blend
+
+    sketchbook 的 paste_image(keep_alpha=False) 使用该公式，
+    这里按相同的单精度运算顺序与截断方式实现，以保证结果逐位一致。
+    """
+    max_value = np.float32(255.0)
+    bg = dst.astype(np.float32) / max_value
+    fg = src.astype(np.float32) / max_value
+    bg_a = bg[..., 3:4]
+    fg_a = fg[..., 3:4]
+
+    alpha = bg_a + fg_a - bg_a * fg_a
+    premultiplied = fg[..., :3] * fg_a + bg[..., :3] * bg_a * (np.float32(1.0) - fg_a)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        color = premultiplied / alpha
+    blended = np.concatenate([max_value * color, max_value * alpha], axis=-1)
+    # 结果完全透明时 image-rs 保持原像素不变
+    return np.where(alpha == 0, dst, blended).astype(np.uint8)
+
+
+@lru_cache(maxsize=None)
+def _get_blend_tables() -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Get lookup tables of Rgba::blend for fully opaque and fully transparent sources
+
+    源像素完全不透明时，结果颜色只取决于底图透明度与源颜色；
+    源像素完全透明时，结果颜色只取决于底图透明度与底图颜色；两种情况的结果透明度都只取决于底图透明度。
+    由于画布上存在浮点误差产生的 254 等透明度，不能直接赋值，因此对全部组合预先计算一次。
+
+    Returns:
+        Tuple: (opaque_color, opaque_alpha, clear_color, clear_alpha), where the color
+               tables are indexed by [dst_alpha, channel_value] and the alpha tables by [dst_alpha]
+    """
+    dst_alpha, value = np.meshgrid(
+        np.arange(256, dtype=np.uint8), np.arange(256, dtype=np.uint8), indexing="ij"
+    )
+    dst = np.stack([value, value, value, dst_alpha], axis=-1)
+    opaque = _blend(dst, np.stack([value, value, value, np.full_like(value, 255)], axis=-1))
+    clear = _blend(dst, np.stack([value, value, value, np.zeros_like(value)], axis=-1))
+    return opaque[..., 0], opaque[:, 0, 3], clear[..., 0], clear[:, 0, 3]
+
+
+@dataclass(frozen=True)
+class _Tile:
+    """A decoded image ready to be blitted
+
+    Attributes:
+        pixels (np.ndarray): The RGBA pixels
+        opaque (np.ndarray): Flat indices of fully opaque pixels
+        clear (np.ndarray): Flat indices of fully transparent pixels
+        partial (np.ndarray): Flat indices of the remaining pixels
+    """
+
+    pixels: "np.ndarray"
+    opaque: "np.ndarray"
+    clear: "np.ndarray"
+    partial: "np.ndarray"
+
+
+@lru_cache(maxsize=None)
+def _get_tile(path: str) -> _Tile:
+    """Decode an image and classify its pixels by alpha, caching the result"""
+    with Image.open(path) as image:
+        pixels = np.array(image.convert("RGBA"))
+    alpha = pixels[..., 3].ravel()
+    return _Tile(
+        pixels=pixels,
+        opaque=np.flatnonzero(alpha == 255),
+        clear=np.flatnonzero(alpha == 0),
+        partial=np.flatnonzero((alpha != 0) & (alpha != 255)),
+    )
+
+
+def _visible(
+    canvas: "np.ndarray", x: int, y: int, width: int, height: int
+) -> Optional[Tuple[slice, slice, slice, slice]]:
+    """Get the part of a region that lies inside the canvas
+
+    选项较多时靠下的选项会超出画布，sketchbook 会裁掉超出的部分，这里保持相同的行为。
+
+    Returns:
+        Optional[Tuple[slice, slice, slice, slice]]: The (rows, columns) slices in the canvas
+                                                     followed by those in the region,
+                                                     or None if nothing is visible
+    """
+    canvas_height, canvas_width = canvas.shape[:2]
+    top, left = max(0, y), max(0, x)
+    bottom, right = min(canvas_height, y + height), min(canvas_width, x + width)
+    if top >= bottom or left >= right:
+        return None
+    return (
+        slice(top, bottom),
+        slice(left, right),
+        slice(top - y, bottom - y),
+        slice(left - x, right - x),
+    )
+
+
+def _blit(canvas: "np.ndarray", x: int, y: int, tile: _Tile):
+    """Blend a tile onto the canvas in place at (x, y), matching paste_image(keep_alpha=False)"""
+    height, width = tile.pixels.shape[:2]
+    visible = _visible(canvas, x, y, width, height)
+    if visible is None:
+        return
+    rows, columns, tile_rows, tile_columns = visible
+    if tile_rows != slice(0, height) or tile_columns != slice(0, width):
+        # 部分超出画布时很少见，直接对可见部分逐像素混合
+        canvas[rows, columns] = _blend(
+            canvas[rows, columns], tile.pixels[tile_rows, tile_columns]
+        )
+        return
+
+    # 区域的切片副本连续存放，reshape 后可以按平铺下标批量读写
+    region = canvas[rows, columns].reshape(-1, 4)
+    source = tile.pixels.reshape(-1, 4)
+    opaque_color, opaque_alpha, clear_color, clear_alpha = _get_blend_tables()
+
+    dst_alpha = region[tile.opaque, 3]
+    region[tile.opaque, :3] = opaque_color[dst_alpha[:, None], source[tile.opaque, :3]]
+    region[tile.opaque, 3] = opaque_alpha[dst_alpha]
+
+    dst_alpha = region[tile.clear, 3]
+    region[tile.clear, :3] = clear_color[dst_alpha[:, None], region[tile.clear, :3]]
+    region[tile.clear, 3] = clear_alpha[dst_alpha]
+
+    region[tile.partial] = _blend(region[tile.partial], source[tile.partial])
+    canvas[rows, columns] = region.reshape(height, width, 4)
+
+
+@lru_cache(maxsize=None)
+def get_trial_base(character: Character) -> "np.ndarray":
+    """Get the canvas with the background and the character, building it on first use
+
+    Args:
+        character (Character): The character who is speaking
+
+    Returns:
+        np.ndarray: A read-only RGBA array, copy it before drawing on it
+    """
+    # 使用 sketchbook 自身合成背景与立绘，保证与 draw_trial 的像素一致
+    image_bytes = Drawer(
+        base_image=str(PLUGIN_PATH / "assets/trial/black.png"),
+        font=TRIAL_FONT,
+    ).paste_image(
+        str(PLUGIN_PATH / "assets/trial/background.png"),
+        region=DrawerRegion(0, 0, TRIAL_IMAGE_WIDTH, TRIAL_IMAGE_HEIGHT),
+        style=PasteStyle(keep_alpha=False),
+    ).paste_image(
+        str(
+            PLUGIN_PATH
+            / "assets/trial"
+            / ("ema.png" if character == Character.EMA else "hiro.png")
+        ),
+        region=DrawerRegion(667, 0, TRIAL_IMAGE_WIDTH, TRIAL_IMAGE_HEIGHT),
+        style=PasteStyle(keep_alpha=False),
+    ).finish()
+    base = _decode(image_bytes)
+    base.flags.writeable = False
+    return base
+
+
+@lru_cache(maxsize=64)
+def _get_option_plate(character: Character, x: int, y: int) -> Optional["np.ndarray"]:
+    """Get the visible part of the option image blended onto the base canvas at (x, y)
+
+    选项底图之间互不重叠且总是最先粘贴，因此结果只取决于角色与位置，
+    缓存后每次绘制只需一次切片赋值。
+
+    Returns:
+        Optional[np.ndarray]: A read-only RGBA array, or None if the option is off the canvas
+    """
+    tile = _get_tile(OPTION_IMAGE)
+    height, width = tile.pixels.shape[:2]
+    base = get_trial_base(character)
+    visible = _visible(base, x, y, width, height)
+    if visible is None:
+        return None
+
+    # 在包含整个选项的小画布上合成，超出原画布的部分合成后丢弃
+    canvas = np.zeros((height, width, 4), dtype=np.uint8)
+    rows, columns, plate_rows, plate_columns = visible
+    canvas[plate_rows, plate_columns] = base[rows, columns]
+    _blit(canvas, 0, 0, tile)
+    plate = canvas[plate_rows, plate_columns].copy()
+    plate.flags.writeable = False
+    return plate
+
+
+def prebake_trial_assets():
+    """Build the trial canvases, decoded tiles, and blend tables ahead of the first request
+
+    同时构建安安说的预合成画布，可直接作为渲染工作进程的预热函数。
+    """
+    prebake_anan_canvases()
+    if not is_available():
+        return
+    _get_blend_tables()
+    for character in Character:
+        get_trial_base(character)
+    _get_tile(OPTION_IMAGE)
+    for statement in Statement:
+        _get_tile(get_statement_image(statement))
+
+
+def _draw_texts(
+    canvas: "np.ndarray",
+    options: List[Option],
+    coordinates: List[Tuple[int, int]],
+):
+    """Draw the texts of all options with one Drawer on a crop of the canvas"""
+    left = max(0, min(x for x, _ in coordinates) + TEXT_OFFSET_X - TRIAL_TEXT_PADDING)
+    top = max(0, min(y for _, y in coordinates) + TEXT_OFFSET_Y - TRIAL_TEXT_PADDING)
+    right = min(
+        TRIAL_IMAGE_WIDTH,
+        max(x for x, _ in coordinates) + TEXT_OFFSET_X + TEXT_WIDTH + TRIAL_TEXT_PADDING,
+    )
+    bottom = min(
+        TRIAL_IMAGE_HEIGHT,
+        max(y for _, y in coordinates) + TEXT_OFFSET_Y + TEXT_HEIGHT + TRIAL_TEXT_PADDING,
+    )
+
+    drawer = Drawer(base_image=_encode_raw(canvas[top:bottom, left:right]), font=TRIAL_FONT)
+    style = TextStyle(
+        color=TEXT_COLOR,
+        bracket_color=BRACKET_COLOR,
+        max_font_height=MAX_FONT_HEIGHT,
+    )
+    for option, (x, y) in zip(options, coordinates):
+        text_x = x + TEXT_OFFSET_X - left
+        text_y = y + TEXT_OFFSET_Y - top
+        drawer = drawer.draw_text(
+            text=option.text,
+            region=DrawerRegion(text_x, text_y, text_x + TEXT_WIDTH, text_y + TEXT_HEIGHT),
+            style=style,
+        )
+    canvas[top:bottom, left:right] = _decode(drawer.finish())
+
+
+def _paste_statement(canvas: "np.ndarray", statement: Statement, x: int, y: int):
+    """Paste a statement icon onto the canvas in place at (x, y)"""
+    path = get_statement_image(statement)
+    tile = _get_tile(path)
+    if tile.pixels.shape[:2] == (STATEMENT_ICON_HEIGHT, STATEMENT_ICON_WIDTH):
+        _blit(canvas, x, y, tile)
+        return
+
+    # 尺寸与图标区域不同的图标需要缩放，image-rs 的缩放结果无法用 Pillow 精确复现，
+    # 因此只把该图标区域交给 sketchbook 合成
+    visible = _visible(canvas, x, y, STATEMENT_ICON_WIDTH, STATEMENT_ICON_HEIGHT)
+    if visible is None:
+        return
+    rows, columns, region_rows, region_columns = visible
+    region = np.zeros((STATEMENT_ICON_HEIGHT, STATEMENT_ICON_WIDTH, 4), dtype=np.uint8)
+    region[region_rows, region_columns] = canvas[rows, columns]
+    pasted = _decode(
+        ImageFitPaster(_encode_raw(region)).paste(path, PasteStyle(keep_alpha=False))
+    )
+    canvas[rows, columns] = pasted[region_rows, region_columns]
+
+
+def _encode_png(canvas: "np.ndarray") -> bytes:
+    """Encode the canvas as PNG with the encoder of sketchbook
+
+    sketchbook 没有单独的编码接口，这里把画布左上角的一个像素原样贴回自身，
+    该操作不改变任何像素，却能使用比 Pillow 快得多的 PNG 编码器输出结果。
+    """
+    return ImageFitPaster(
+        _encode_raw(canvas),
+        region=DrawerRegion(0, 0, 1, 1),
+    ).paste(_encode_raw(canvas[:1, :1]), PasteStyle(keep_alpha=True))
+
+
+def draw_trial_numpy(character: Character, options: List[Option]) -> bytes:
+    """Draw the trial image on a NumPy canvas, pixel-identical to draw_trial
+
+    draw_trial 依次为每个选项粘贴底图、绘制文本、粘贴图标。
+    由于选项底图之间互不重叠、文本区域只与本选项的图标重叠，
+    这里改为先粘贴全部底图（使用缓存的合成结果），再一次绘制全部文本，
+    最后按顺序粘贴图标，像素结果不变。
+
+    Args:
+        character (Character): The character who is speaking
+        options (List[Option]): The options being spoken
+
+    Returns:
+        bytes: The image bytes of the drawn image
+
+    Raises:
+        ValueError: If options count exceeds maximum limit
+        RuntimeError: If NumPy is not installed
+    """
+    if np is None:
+        raise RuntimeError("NumPy 合成后端需要安装 numpy")
+
+    # 前置校验：确保选项数量在合理范围内
+    if len(options) > MAX_OPTIONS_COUNT:
+        raise ValueError(f"选项数量过多，最多支持 {MAX_OPTIONS_COUNT} 个选项")
+
+    if len(options) == 0:
+        raise ValueError("选项数量不能为 0")
+
+    canvas = get_trial_base(character).copy()
+    coordinates = get_option_coordinates(len(options))
+
+    for x, y in coordinates:
+        plate = _get_option_plate(character, x, y)
+        if plate is not None:
+            height, width = plate.shape[:2]
+            canvas[y:y + height, x:x + width] = plate
+
+    _draw_texts(canvas, options, coordinates)
+
+    for option, (x, y) in zip(options, coordinates):
+        _paste_statement(canvas, option.statement, x + STATEMENT_OFFSET_X, y + STATEMENT_OFFSET_Y)
+
+    return _encode_png(canvas)
@@ -4,11 +4,14 @@
 - get_magic_statement: 魔法角色名到 Statement 枚举的转换
 - get_statement: 陈述类型到 Statement 枚举的转换
 - get_character: 角色名到 Character 枚举的转换
+- get_anan_render_key / get_trial_render_key: 生成渲染请求的规范化键
 """
 
-from typing import Optional
+import hashlib
+import json
+from typing import List, Optional
 
-from .models import Statement, Character
+from .models import Statement, Character, Option
 
 
 def _normalize_text(text: str) -> str:
@@ -160,4 +163,40 @@ def get_character(character: str) -> Character:
         raise ValueError(
             f"无效的角色 '{character}'，请从以下选项中选择：艾玛, 希罗"
         )
-    return result
\ No newline at end of file
+    return result
+
+
+def _hash_render_key(parts: list) -> str:
+    """Hash the canonical JSON form of a render request"""
+    canonical = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def get_anan_render_key(text: str, face: Optional[str] = None) -> str:
+    """Get the canonical key of an anan render request
+
+    相同的文本与表情总是得到相同的键，可用于缓存、路由和性能分析文件命名。
+
+    Args:
+        text (str): The text to be drawn
+        face (Optional[str]): The face type to be used
+
+    Returns:
+        str: The render key
+    """
+    return _hash_render_key(["anan", text, face])
+
+
+def get_trial_render_key(character: Character, options: List[Option]) -> str:
+    """Get the canonical key of a trial render request
+
+    Args:
+        character (Character): The character who is speaking
+        options (List[Option]): The options being spoken
+
+    Returns:
+        str: The render key
+    """
+    return _hash_render_key(
+        ["trial", character.value, [[o.statement.value, o.text] for o in options]]
+    )